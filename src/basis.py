@@ -0,0 +1,132 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    basis.py                                           :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:36:58 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 14:53:09 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module provides feature-basis transforms applied on top of the
+normalization of data_loader.normalize_data, so that the linear model can fit
+a curve of a single normalized feature x:
+    - polynomial:    x, x², ..., x^degree
+    - linear_spline: x, max(0, x - k₁), ..., max(0, x - kₙ) (piecewise linear)
+    - bspline:       B-splines of the given degree on the knots, the first one
+                     being dropped as they sum to one like the intercept column
+A transform is described by a JSON-serializable spec dict (see make_basis),
+saved with the model by model_saver so that predictions apply the same basis.
+The expanded columns are produced by expand, which linear_regression.iter_blocks
+also applies block by block so that the Gram moments of large datasets are
+accumulated without ever materializing the (m, n_basis) design matrix.
+"""
+
+import numpy as np
+
+BASIS_TYPES = ('polynomial', 'linear_spline', 'bspline')
+
+
+def make_basis(kind, x, degree=3, n_knots=5):
+    """
+    Build the spec of a basis transform, the knots being placed at evenly
+    spaced quantiles of the (normalized) training feature.
+    
+    Args:
+        kind (str): One of BASIS_TYPES.
+        x (np.array): The normalized feature values the model will be fitted on.
+        degree (int): Degree of the polynomial or of the B-splines.
+        n_knots (int): Number of interior knots of the splines.
+        
+    Returns:
+        dict: The spec, e.g. {'type': 'bspline', 'degree': 3, 'knots': [...], 'boundary': [lo, hi]}.
+    """
+    if kind not in BASIS_TYPES:
+        raise ValueError(f"Unknown basis '{kind}', expected one of {BASIS_TYPES}")
+    if degree < 1:
+        raise ValueError(f"The degree of the basis must be at least 1, got {degree}")
+    if kind == 'polynomial':
+        return {'type': kind, 'degree': int(degree)}
+    x = np.asarray(x, dtype=np.float64)
+    quantiles = np.linspace(0, 1, n_knots + 2)[1:-1]
+    # Repeated values (e.g. rounded mileages) may give the same knot twice
+    knots = np.unique(np.quantile(x, quantiles)).tolist()
+    if kind == 'linear_spline':
+        return {'type': kind, 'knots': knots}
+    return {'type': kind, 'degree': int(degree), 'knots': knots,
+            'boundary': [float(np.min(x)), float(np.max(x))]}
+
+
+def basis_size(spec):
+    """Number of columns produced by the basis (the intercept excluded)."""
+    if spec['type'] == 'polynomial':
+        return spec['degree']
+    if spec['type'] == 'linear_spline':
+        return 1 + len(spec['knots'])
+    return len(spec['knots']) + spec['degree']
+
+
+def basis_names(spec, feature='km'):
+    """Names of the expanded columns, for the training logs."""
+    if spec['type'] == 'polynomial':
+        return [feature] + [f'{feature}^{power}' for power in range(2, spec['degree'] + 1)]
+    if spec['type'] == 'linear_spline':
+        return [feature] + [f'({feature} - {knot:.3g})+' for knot in spec['knots']]
+    return [f'B{i}({feature})' for i in range(1, basis_size(spec) + 1)]
+
+
+def bspline_columns(x, knots, boundary, degree):
+    """
+    Evaluate the B-splines of a clamped knot vector with the Cox-de Boor
+    recursion, vectorized over the rows. Each row has at most degree + 1
+    non-zero columns, at consecutive positions. Values outside the boundary
+    are clamped to it (constant extrapolation).
+    
+    Returns:
+        np.array: The (m, len(knots) + degree + 1) basis values.
+    """
+    lo, hi = boundary
+    x = np.clip(x, lo, hi)[:, np.newaxis]
+    t = np.concatenate(([lo] * (degree + 1), knots, [hi] * (degree + 1)))
+    columns = ((t[:-1] <= x) & (x < t[1:])).astype(np.float64)
+    # The upper boundary belongs to the last non-empty interval
+    columns[x[:, 0] == hi, len(t) - degree - 2] = 1.0
+    for k in range(1, degree + 1):
+        left_span = t[k:-1] - t[:-k - 1]
+        right_span = t[k + 1:] - t[1:-k]
+        # Terms over an empty knot span are 0
+        left = np.divide(x - t[:-k - 1], left_span, out=np.zeros((len(x), len(left_span))),
+                         where=left_span > 0)
+        right = np.divide(t[k + 1:] - x, right_span, out=np.zeros((len(x), len(right_span))),
+                          where=right_span > 0)
+        columns = left * columns[:, :-1] + right * columns[:, 1:]
+    # Missing values stay missing instead of falling in no interval
+    columns[np.isnan(x[:, 0])] = np.nan
+    return columns
+
+
+def expand(x, spec):
+    """
+    Expand a normalized feature into the columns of the basis.
+    
+    Args:
+        x (np.array): The normalized feature values, (m,) or (m, 1).
+        spec (dict): The basis spec returned by make_basis.
+        
+    Returns:
+        np.array: The (m, basis_size(spec)) float64 columns.
+    """
+    x = np.asarray(x, dtype=np.float64).reshape(-1)
+    if spec['type'] == 'polynomial':
+        return x[:, np.newaxis] ** np.arange(1, spec['degree'] + 1)
+    knots = np.asarray(spec['knots'], dtype=np.float64)
+    if spec['type'] == 'linear_spline':
+        columns = np.empty((len(x), 1 + len(knots)))
+        columns[:, 0] = x
+        np.maximum(x[:, np.newaxis] - knots, 0.0, out=columns[:, 1:])
+        return columns
+    return bspline_columns(x, knots, spec['boundary'], spec['degree'])[:, 1:]
+
@@ -0,0 +1,234 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    benchmark.py                                       :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:18:23 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 14:28:19 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module benchmarks the hot paths of the project on synthetic km/price
+datasets of growing size: load_data, normalize_data, get_statistics,
+LinearRegression.fit, precision_main.score and predict_price.
+For each operation it reports the wall time, the throughput (rows/s) and the
+peak resident memory, and writes the results as JSON so runs can be compared
+between releases (see --baseline).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import load_data, normalize_data, get_statistics
+from linear_regression import LinearRegression
+from model_saver import predict_price
+from precision_main import score
+
+GENERATION_CHUNK = 1000000
+
+
+def generate_dataset(filepath, n_rows, seed=42):
+    """
+    Write a synthetic km/price CSV file, chunk by chunk to bound memory.
+    
+    Args:
+        filepath (str): The CSV file to create.
+        n_rows (int): Number of rows to generate.
+        seed (int): Seed of the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, GENERATION_CHUNK):
+        size = min(GENERATION_CHUNK, n_rows - start)
+        km = rng.uniform(0, 300000, size).round()
+        price = (9000 - 0.025 * km + rng.normal(0, 600, size)).round()
+        pd.DataFrame({'km': km, 'price': price}).to_csv(
+            filepath, mode='w' if start == 0 else 'a', header=(start == 0), index=False)
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of the process (Linux only, no-op elsewhere)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident memory of the process in MB: VmHWM on Linux
+    (resettable between operations), ru_maxrss otherwise.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+def measure(func, repeat=1):
+    """
+    Run func repeat times with its prints silenced.
+    
+    Args:
+        func (callable): The operation to time.
+        repeat (int): Number of runs.
+        
+    Returns:
+        Tuple: (result of the last run, best wall time in seconds, peak RSS in MB)
+    """
+    best = float('inf')
+    peak = 0.0
+    result = None
+    for _ in range(repeat):
+        result = None
+        reset_peak_rss()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        peak = max(peak, peak_rss_mb())
+    return result, best, peak
+
+
+def benchmark_size(n_rows, workdir, solvers, repeat=1):
+    """
+    Benchmark every operation on a dataset of n_rows rows.
+    
+    Args:
+        n_rows (int): Number of rows of the synthetic dataset.
+        workdir (str): Directory where the CSV file is generated.
+        solvers (list): LinearRegression solvers to benchmark ('gd_reference' is
+        the gd solver with its reference loop over the data).
+        repeat (int): Number of runs of each operation (the best time is kept).
+        
+    Returns:
+        list: One result dict per operation.
+    """
+    filepath = os.path.join(workdir, f'bench_{n_rows}.csv')
+    generate_dataset(filepath, n_rows)
+    results = []
+
+    def record(operation, func):
+        result, elapsed, peak = measure(func, repeat)
+        results.append({
+            'rows': n_rows,
+            'operation': operation,
+            'wall_s': elapsed,
+            'rows_per_s': n_rows / elapsed if elapsed > 0 else None,
+            'peak_rss_mb': peak
+        })
+        print(f"  {operation:<24} {elapsed:>10.4f}s {n_rows / max(elapsed, 1e-12):>16,.0f} rows/s {peak:>10.1f} MB")
+        return result
+
+    data = record('load_data', lambda: load_data(filepath))
+    normalized_data, norm_stat = record('normalize_data', lambda: normalize_data(data))
+    record('get_statistics', lambda: get_statistics(data))
+    X = normalized_data['km'].values
+    y = normalized_data['price'].values
+    model = None
+    for solver in solvers:
+        if solver == 'gd_reference':
+            model = LinearRegression(learning_rate=0.03, tolerance=1e-6, n_iterations=1000,
+                                     solver='gd', gd_kernel='reference')
+        else:
+            model = LinearRegression(learning_rate=0.03, tolerance=1e-6, n_iterations=1000, solver=solver)
+        record(f'fit[{solver}]', lambda: model.fit(X, y))
+    params = dict(norm_stat, theta0=model.theta0, theta1=model.theta1)
+    record('score', lambda: score(params, X, y))
+    km = data['km'].to_numpy(dtype=np.float64)
+    record('predict_price', lambda: predict_price(km, params))
+    os.remove(filepath)
+    return results
+
+
+def compare(results, baseline_file, threshold):
+    """
+    Compare the wall times with a previous benchmark run.
+    
+    Args:
+        results (list): The results of this run.
+        baseline_file (str): The JSON file written by a previous run.
+        threshold (float): Ratio above which an operation is reported as a regression.
+        
+    Returns:
+        list: The (rows, operation, ratio) of the regressions.
+    """
+    with open(baseline_file) as f:
+        baseline = {(r['rows'], r['operation']): r for r in json.load(f)['results']}
+    regressions = []
+    for r in results:
+        previous = baseline.get((r['rows'], r['operation']))
+        if previous and previous['wall_s'] > 0:
+            ratio = r['wall_s'] / previous['wall_s']
+            if ratio > threshold:
+                regressions.append((r['rows'], r['operation'], ratio))
+    return regressions
+
+
+def main(args):
+    """Main function to run the benchmarks and write the JSON report."""
+    exponent_max = int(round(np.log10(args.max_rows)))
+    sizes = [10 ** e for e in range(int(round(np.log10(args.min_rows))), exponent_max + 1)]
+    solvers = args.solvers.split(',')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in sizes:
+            print(f"\n✓Benchmarking {n_rows:,} rows...")
+            print("-" * 80)
+            results += benchmark_size(n_rows, workdir, solvers, repeat=args.repeat)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\n✓ Benchmark results saved: {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for n_rows, operation, ratio in regressions:
+            print(f"✗ Regression: {operation} on {n_rows:,} rows is {ratio:.2f}x slower than the baseline")
+        if regressions:
+            return 1
+        print(f"✓ No regression above {args.threshold:.2f}x the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark loading, normalization, fitting, scoring and prediction.")
+    parser.add_argument('--min_rows', type=float, default=1e3, help='Smallest dataset size (power of 10).')
+    parser.add_argument('--max_rows', type=float, default=1e6, help='Largest dataset size (power of 10, up to 1e8).')
+    parser.add_argument('--solvers', type=str, default='gd,gd_reference,normal',
+                        help='Comma-separated solvers to benchmark (gd_reference: the reference gd loop).')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per operation, the best time is kept.')
+    parser.add_argument('--output', type=str, default='bench_results.json', help='JSON file where the results are written.')
+    parser.add_argument('--baseline', type=str, help='Previous results to compare with; exits with 1 on regression.')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio reported as a regression.')
+    args = parser.parse_args()
+    sys.exit(main(args))
@@ -0,0 +1,146 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    cost_history.py                                    :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:26:36 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 14:26:36 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module stores the cost of every training iteration in preallocated
+NumPy buffers instead of a list of Python floats, with a configurable
+retention so that long runs keep a bounded memory:
+- 'full': every cost (the buffer doubles when n_iterations is exceeded),
+- 'every': one cost every k iterations (plus the last one),
+- 'ring': the last `size` costs, plus a min/max envelope of the whole run
+  in at most `size` buckets (the bucket width doubles when they are full).
+"""
+import numpy as np
+
+HISTORY_MODES = ('full', 'every', 'ring')
+
+
+class CostHistory:
+    """
+    Cost history of a training run.
+    
+    Arguments:
+    mode (str): Retention: 'full', 'every' or 'ring'.
+    every (int): Sampling period of the 'every' mode.
+    size (int): Number of costs kept by the 'ring' mode, and of envelope buckets.
+    capacity (int): Initial size of the 'full' / 'every' buffers (e.g. n_iterations).
+    
+    Attributes:
+    first (float): The first cost recorded.
+    last (float): The last cost recorded.
+    previous (float): The cost recorded before the last one, for convergence checks.
+    """
+    def __init__(self, mode='full', every=1, size=1000, capacity=1000):
+        if mode not in HISTORY_MODES:
+            raise ValueError(f"Unknown history mode '{mode}', expected one of {HISTORY_MODES}")
+        if every < 1 or size < 2:
+            raise ValueError("every must be >= 1 and size >= 2")
+        self.mode = mode
+        self.every = every
+        self.size = size
+        self._count = 0      # costs appended
+        self._stored = 0     # costs held in the buffers
+        self.first = self.last = self.previous = float('nan')
+        if mode == 'ring':
+            capacity = size
+            self._env_min = np.empty(size)
+            self._env_max = np.empty(size)
+            self._bucket_width = 1
+            self._n_buckets = 0
+        elif mode == 'every':
+            capacity = capacity // every + 1
+        self._iterations = np.empty(max(capacity, 1), dtype=np.int64)
+        self._values = np.empty(max(capacity, 1))
+
+    def __len__(self):
+        """Number of costs appended, retained or not."""
+        return self._count
+
+    def append(self, cost):
+        """
+        Record the cost of the next iteration.
+        
+        Args:
+            cost (float): The cost of the iteration.
+        """
+        iteration = self._count
+        self._count += 1
+        self.previous, self.last = self.last, cost
+        if iteration == 0:
+            self.first = cost
+        if self.mode == 'ring':
+            slot = iteration % self.size
+            self._iterations[slot] = iteration
+            self._values[slot] = cost
+            self._stored = min(self._stored + 1, self.size)
+            self._update_envelope(iteration, cost)
+        elif self.mode == 'full' or iteration % self.every == 0:
+            self._store(iteration, cost)
+
+    def _store(self, iteration, cost):
+        if self._stored == len(self._values):
+            self._iterations = np.resize(self._iterations, 2 * self._stored)
+            self._values = np.resize(self._values, 2 * self._stored)
+        self._iterations[self._stored] = iteration
+        self._values[self._stored] = cost
+        self._stored += 1
+
+    def _update_envelope(self, iteration, cost):
+        bucket = iteration // self._bucket_width
+        if bucket == self.size:
+            # Merge the buckets pairwise and double their width
+            half = self.size // 2
+            self._env_min[:half] = np.minimum(self._env_min[0:2 * half:2], self._env_min[1:2 * half:2])
+            self._env_max[:half] = np.maximum(self._env_max[0:2 * half:2], self._env_max[1:2 * half:2])
+            if self.size % 2:
+                self._env_min[half] = self._env_min[self.size - 1]
+                self._env_max[half] = self._env_max[self.size - 1]
+            self._n_buckets = self.size - half
+            self._bucket_width *= 2
+            bucket = iteration // self._bucket_width
+        if bucket == self._n_buckets:
+            self._env_min[bucket] = self._env_max[bucket] = cost
+            self._n_buckets += 1
+        else:
+            self._env_min[bucket] = min(self._env_min[bucket], cost)
+            self._env_max[bucket] = max(self._env_max[bucket], cost)
+
+    def samples(self):
+        """
+        Return the retained costs in iteration order, including the last one.
+        
+        Returns:
+            Tuple: (iterations, costs) numpy arrays.
+        """
+        if self.mode == 'ring' and self._count > self.size:
+            start = self._count % self.size
+            order = np.r_[start:self.size, 0:start]
+            return self._iterations[order], self._values[order]
+        iterations = self._iterations[:self._stored]
+        values = self._values[:self._stored]
+        if self._count and iterations[-1] != self._count - 1:
+            iterations = np.append(iterations, self._count - 1)
+            values = np.append(values, self.last)
+        return iterations, values
+
+    def envelope(self):
+        """
+        Return the min/max envelope of the whole run ('ring' mode only).
+        
+        Returns:
+            Tuple: (first iteration of each bucket, minimum costs, maximum costs),
+            or None in the other modes.
+        """
+        if self.mode != 'ring':
+            return None
+        n = self._n_buckets
+        return np.arange(n) * self._bucket_width, self._env_min[:n].copy(), self._env_max[:n].copy()
@@ -6,7 +6,7 @@
 #    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/05 15:34:29 by tissad            #+#    #+#              #
-#    Updated: 2026/02/06 12:16:23 by tissad           ###   ########.fr        #
+#    Updated: 2026/10/18 15:03:33 by tissad           ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
@@ -15,23 +15,189 @@
 This module provides a function to load data from a CSV file into a 
 pandas DataFrame. It includes error handling to manage cases where 
 the file is not found or other exceptions occur during loading.
+It also provides a streaming path that reads the CSV in chunks and only
+keeps running sufficient statistics, so files larger than memory can be
+used for training.
+A parsed CSV can be cached as one binary .npy file per column, which later
+loads memory-map instead of parsing the text again.
+Dirty files can be parsed in parallel with bad rows quarantined (see ingest.py).
 """
+import hashlib
+import json
+import os
+import numpy as np
 import pandas as pd
+from ingest import ingest_csv
 
-def load_data(filepath):
+# Labels used when printing the statistics of the default columns
+COLUMN_LABELS = {'km': 'KM', 'price': 'Prix'}
+
+DEFAULT_CACHE_DIR = './.cache'
+
+
+def cache_path(filepath, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Function to get the cache directory of a CSV file (one per absolute source path).
+    
+    Args:
+        filepath (str): The path to the CSV file.
+        cache_dir (str): The root directory of the cache.
+        
+    Returns:
+        str: The directory holding the cached columns of this file.
+    """
+    source = os.path.abspath(filepath)
+    return os.path.join(cache_dir, hashlib.sha1(source.encode()).hexdigest()[:16])
+
+
+def source_fingerprint(filepath):
+    """
+    Function to identify a version of a source file by its path, size and mtime.
+    
+    Args:
+        filepath (str): The path to the source file.
+        
+    Returns:
+        dict: The source path, size and modification time in nanoseconds.
+    """
+    st = os.stat(filepath)
+    return {'source': os.path.abspath(filepath), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def save_array(values, filename):
+    """
+    Write an array to a temporary .npy file and rename it over the target.
+    
+    Args:
+        values (np.ndarray): The array to save.
+        filename (str): The path to the target .npy file.
+    """
+    tmp_file = filename + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        np.save(f, values, allow_pickle=False)
+    os.replace(tmp_file, filename)
+
+
+def write_cache(data, filepath, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Function to save a DataFrame loaded from a CSV file as raw binary columns.
+    Each column is written to a temporary file and renamed, and the manifest
+    is written last, so a cache interrupted mid-write is never used.
+    
+    Args:
+        data (pd.DataFrame): The DataFrame parsed from the CSV file.
+        filepath (str): The path to the source CSV file.
+        cache_dir (str): The root directory of the cache.
+    """
+    directory = cache_path(filepath, cache_dir)
+    os.makedirs(directory, exist_ok=True)
+    manifest_file = os.path.join(directory, 'manifest.json')
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
+    columns = []
+    masked = []
+    for i, column in enumerate(data.columns):
+        values = data[column].to_numpy()
+        if values.dtype == object:
+            # Text columns are stored as fixed-width unicode so they stay mappable,
+            # with a mask of the missing values, which astype(str) turns into 'nan'
+            missing = pd.isna(values)
+            if missing.any():
+                save_array(missing, os.path.join(directory, f'{i}.mask.npy'))
+                masked.append(column)
+            values = values.astype(str)
+        save_array(values, os.path.join(directory, f'{i}.npy'))
+        columns.append(column)
+    manifest = dict(source_fingerprint(filepath), columns=columns, masked=masked, rows=len(data))
+    with open(manifest_file + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(manifest_file + '.tmp', manifest_file)
+
+
+def read_cache(filepath, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Function to load the cached columns of a CSV file as memory-mapped arrays.
+    
+    Args:
+        filepath (str): The path to the source CSV file.
+        cache_dir (str): The root directory of the cache.
+        
+    Returns:
+        pd.DataFrame: A DataFrame backed by the read-only mapped columns,
+        or None if there is no cache or the source file changed since it was written.
+    """
+    directory = cache_path(filepath, cache_dir)
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    fingerprint = source_fingerprint(filepath)
+    if any(manifest.get(key) != value for key, value in fingerprint.items()):
+        return None
+    columns = {}
+    for i, column in enumerate(manifest['columns']):
+        values = np.load(os.path.join(directory, f'{i}.npy'), mmap_mode='r')
+        if values.dtype.kind == 'U':
+            values = values.astype(object)
+            if column in manifest.get('masked', []):
+                values[np.load(os.path.join(directory, f'{i}.mask.npy'))] = np.nan
+        columns[column] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def cast_numeric(data, dtype):
+    """
+    Cast every numeric column of a DataFrame to a float dtype (e.g. np.float32
+    to halve the memory and bandwidth of the columns).
+    
+    Args:
+        data (pd.DataFrame): The DataFrame to cast.
+        dtype (np.dtype): The float dtype of the numeric columns.
+        
+    Returns:
+        pd.DataFrame: The DataFrame with cast numeric columns.
+    """
+    numeric = data.select_dtypes('number').columns
+    return data.astype({column: dtype for column in numeric})
+
+
+def load_data(filepath, use_cache=False, cache_dir=DEFAULT_CACHE_DIR, dtype=None,
+              ingest=False, schema=None, quarantine_file=None, workers=None):
     """
     Function to load data from a CSV file into a pandas DataFrame.
     Args:
         filepath (str): The path to the CSV file to be loaded.
+        use_cache (bool): Memory-map the binary cache of the file when it is up to
+        date, otherwise parse the CSV and (re)build the cache.
+        cache_dir (str): The root directory of the cache.
+        dtype (np.dtype): Float dtype of the numeric columns (default: as parsed).
+        ingest (bool): Parse the file in parallel byte ranges and quarantine the
+        invalid rows instead of failing (see ingest.ingest_csv).
+        schema (dict): {column: dtype} of the columns validated by the ingestion.
+        quarantine_file (str): CSV file receiving the rows rejected by the ingestion.
+        workers (int): Number of parsing threads of the ingestion.
         
     Returns:
         pd.DataFrame: A DataFrame containing the loaded data, 
         or None if an error occurs.
     """
     try:
-        data = pd.read_csv(filepath)
+        if use_cache:
+            data = read_cache(filepath, cache_dir)
+            if data is not None:
+                print(f"✓Loaded from cache: {cache_path(filepath, cache_dir)}")
+                print(f"✓Length of data: {len(data)}")
+                return data if dtype is None else cast_numeric(data, dtype)
+        if ingest:
+            data = ingest_csv(filepath, schema=schema, quarantine_file=quarantine_file, workers=workers)
+        else:
+            data = pd.read_csv(filepath)
         print(f"✓Length of data: {len(data)}")
-        return data
+        if use_cache:
+            write_cache(data, filepath, cache_dir)
+            print(f"✓Cache written: {cache_path(filepath, cache_dir)}")
+        return data if dtype is None else cast_numeric(data, dtype)
     except FileNotFoundError:
         print(f"✗ Error: File '{filepath}' not found.")
         return None
@@ -42,66 +208,342 @@ def load_data(filepath):
 
 
 #normalize the data
-def normalize_data(data):
+def normalize_data(data, features=('km',), target='price', dtype=None):
     """
     Function to normalize the data using  z-score normalization.
     Args:
         data (pd.DataFrame): The DataFrame containing the data to be normalized.
+        features (list): The feature columns to normalize.
+        target (str): The target column to normalize.
+        dtype (np.dtype): Float dtype of the normalized columns (e.g. np.float32);
+        their mean and std are then accumulated in float64.
         
     Returns:
         Tuple: (normalized_data, stats) where normalized_data is a DataFrame with normalized values,
-        and stats is a dictionary containing the mean and standard deviation for each column.        
+        and stats is a dictionary containing the mean and standard deviation for each column
+        ('<column>_mean', '<column>_std') and the 'features' and 'target' column names.
     """
-    
-    km_mean = data['km'].mean()
-    km_std = data['km'].std()
-    price_mean = data['price'].mean()
-    price_std = data['price'].std()
-    
     normalized_data = data.copy()
-    normalized_data['km'] = (data['km'] - km_mean) / km_std
-    normalized_data['price'] = (data['price'] - price_mean) / price_std
-    
-    stats = {
-        'km_mean': km_mean,
-        'km_std': km_std,
-        'price_mean': price_mean,
-        'price_std': price_std
-    }
+    stats = {}
+    for column in list(features) + [target]:
+        if dtype is None:
+            mean = data[column].mean()
+            std = data[column].std()
+        else:
+            values = data[column].to_numpy(dtype=dtype)
+            mean = float(np.nanmean(values, dtype=np.float64))
+            std = float(np.nanstd(values, dtype=np.float64, ddof=1))
+        # A constant column (e.g. a one-hot category absent from the data) is only centered
+        if std == 0:
+            std = 1.0
+        if dtype is None:
+            normalized_data[column] = (data[column] - mean) / std
+        else:
+            # Python float scalars keep the float32 dtype of the values
+            normalized_data[column] = (values - mean) / std
+        stats[f'{column}_mean'] = mean
+        stats[f'{column}_std'] = std
+    stats['features'] = list(features)
+    stats['target'] = target
     
     print(f"✓Data normalization complete.")
-    print(f"  - KM: μ={km_mean:.0f}, σ={km_std:.0f}")
-    print(f"  - Prix: μ={price_mean:.0f}, σ={price_std:.0f}")
+    for column in list(features) + [target]:
+        label = COLUMN_LABELS.get(column, column)
+        print(f"  - {label}: μ={stats[f'{column}_mean']:.0f}, σ={stats[f'{column}_std']:.0f}")
     
     return normalized_data, stats
 
-def get_statistics(data):
+
+def one_hot_encode(data, columns):
+    """
+    Function to replace categorical columns (e.g. fuel type) by 0/1 indicator
+    columns named '<column>_<category>' so they can be used as features.
+    
+    Args:
+        data (pd.DataFrame): The DataFrame containing the categorical columns.
+        columns (list): The categorical columns to encode.
+        
+    Returns:
+        Tuple: (encoded_data, dummy_columns) where dummy_columns lists the
+        indicator columns that were created.
+    """
+    encoded_data = pd.get_dummies(data, columns=list(columns), dtype=float)
+    dummy_columns = [c for c in encoded_data.columns if c not in data.columns]
+    return encoded_data, dummy_columns
+
+
+def prepare_features(data, features, categorical=()):
+    """
+    Function to build the feature columns expected by a trained model:
+    categorical columns are one-hot encoded and indicator columns of
+    categories absent from this data are filled with zeros.
+    
+    Args:
+        data (pd.DataFrame): The raw data.
+        features (list): The feature columns of the model.
+        categorical (list): The categorical columns that were one-hot encoded at training.
+        
+    Returns:
+        pd.DataFrame: The data with every feature column present.
+    """
+    if categorical:
+        data, _ = one_hot_encode(data, categorical)
+    missing = [f for f in features if f not in data.columns]
+    if missing:
+        data = data.assign(**{f: 0.0 for f in missing})
+    return data
+
+def get_statistics(data, columns=('km', 'price')):
     """
     Function to calculate basic statistics (min, max, mean, median, std)
-      for the 'km' and 'price' columns.
+      for the given columns ('km' and 'price' by default).
     
     Args:
         data (pd.DataFrame): The DataFrame containing the data for which 
         statistics are to be calculated.
+        columns (list): The columns to describe.
         
     Returns:
         dict: Calculated statistics
     """
-    stats = {
-        'km': {
-            'min': data['km'].min(),
-            'max': data['km'].max(),
-            'mean': data['km'].mean(),
-            'median': data['km'].median(),
-            'std': data['km'].std()
-        },
-        'price': {
-            'min': data['price'].min(),
-            'max': data['price'].max(),
-            'mean': data['price'].mean(),
-            'median': data['price'].median(),
-            'std': data['price'].std()
+    stats = {}
+    for column in columns:
+        stats[column] = {
+            'min': data[column].min(),
+            'max': data[column].max(),
+            'mean': data[column].mean(),
+            'median': data[column].median(),
+            'std': data[column].std()
+        }
+    
+    return stats
+
+
+def group_statistics(data, group_column, feature='km', target='price'):
+    """
+    Function to compute the statistics of every group of rows at once with
+    segmented sums (np.bincount over the group codes) instead of one pass per group.
+    The second moments are computed from the deviations to the group means,
+    which is numerically stable.
+    
+    Args:
+        data (pd.DataFrame): The DataFrame containing the data.
+        group_column (str): The column identifying the group of each row.
+        feature (str): The feature column.
+        target (str): The target column.
+        
+    Returns:
+        pd.DataFrame: One row per group (indexed by group key) with the count 'n',
+        the means and sample standard deviations of the feature and the target,
+        and the sums of squared deviations 'feature_m2', 'target_m2' and 'cross_m2'.
+    """
+    codes, groups = pd.factorize(data[group_column], sort=True)
+    x = data[feature].to_numpy(dtype=np.float64)
+    y = data[target].to_numpy(dtype=np.float64)
+    n_groups = len(groups)
+    n = np.bincount(codes, minlength=n_groups)
+    x_mean = np.bincount(codes, weights=x, minlength=n_groups) / n
+    y_mean = np.bincount(codes, weights=y, minlength=n_groups) / n
+    x_dev = x - x_mean[codes]
+    y_dev = y - y_mean[codes]
+    x_m2 = np.bincount(codes, weights=x_dev * x_dev, minlength=n_groups)
+    y_m2 = np.bincount(codes, weights=y_dev * y_dev, minlength=n_groups)
+    cross_m2 = np.bincount(codes, weights=x_dev * y_dev, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_std = np.sqrt(x_m2 / (n - 1))
+        y_std = np.sqrt(y_m2 / (n - 1))
+    return pd.DataFrame({
+        'n': n,
+        f'{feature}_mean': x_mean,
+        f'{feature}_std': x_std,
+        f'{target}_mean': y_mean,
+        f'{target}_std': y_std,
+        'feature_m2': x_m2,
+        'target_m2': y_m2,
+        'cross_m2': cross_m2
+    }, index=pd.Index(groups, name=group_column))
+
+
+class SufficientStats:
+    """
+    Running sufficient statistics of the (km, price) pairs.
+    
+    The statistics are kept in the numerically stable centered form
+    (count, means, sums of squared deviations and co-deviation) and
+    chunks are combined with the Chan et al. pairwise merge, which avoids
+    the cancellation of the naive Σx² - (Σx)²/n formula on large values.
+    
+    Attributes:
+    n (int): Number of rows seen.
+    km_mean (float): Running mean of the mileage.
+    price_mean (float): Running mean of the price.
+    km_m2 (float): Σ(km - km_mean)².
+    price_m2 (float): Σ(price - price_mean)².
+    cross_m2 (float): Σ(km - km_mean)(price - price_mean).
+    
+    With a forgetting factor (see decay) n is an effective, non-integer count.
+    """
+    def __init__(self):
+        self.n = 0
+        self.km_mean = 0.0
+        self.price_mean = 0.0
+        self.km_m2 = 0.0
+        self.price_m2 = 0.0
+        self.cross_m2 = 0.0
+
+    def update(self, km, price):
+        """
+        Merge a chunk of observations into the running statistics.
+        
+        Args:
+            km (np.array): Mileage values of the chunk.
+            price (np.array): Price values of the chunk.
+        """
+        km = np.asarray(km, dtype=np.float64)
+        price = np.asarray(price, dtype=np.float64)
+        if len(km) == 0:
+            return
+        chunk = SufficientStats()
+        chunk.n = len(km)
+        chunk.km_mean = float(np.mean(km))
+        chunk.price_mean = float(np.mean(price))
+        km_dev = km - chunk.km_mean
+        price_dev = price - chunk.price_mean
+        chunk.km_m2 = float(np.dot(km_dev, km_dev))
+        chunk.price_m2 = float(np.dot(price_dev, price_dev))
+        chunk.cross_m2 = float(np.dot(km_dev, price_dev))
+        self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Merge another SufficientStats into this one (Chan et al. update).
+        
+        Args:
+            other (SufficientStats): The statistics to merge in.
+        """
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return
+        n = self.n + other.n
+        d_km = other.km_mean - self.km_mean
+        d_price = other.price_mean - self.price_mean
+        weight = self.n * other.n / n
+        self.km_m2 += other.km_m2 + d_km * d_km * weight
+        self.price_m2 += other.price_m2 + d_price * d_price * weight
+        self.cross_m2 += other.cross_m2 + d_km * d_price * weight
+        self.km_mean += d_km * other.n / n
+        self.price_mean += d_price * other.n / n
+        self.n = n
+
+    def decay(self, factor):
+        """
+        Down-weight every observation seen so far by an exponential forgetting
+        factor, so that the statistics follow a drifting distribution.
+        The means are unchanged, the count and the deviation sums are scaled.
+        
+        Args:
+            factor (float): Weight kept by the past observations, in (0, 1].
+        """
+        if not 0 < factor <= 1:
+            raise ValueError(f"forgetting factor must be in (0, 1], got {factor}")
+        self.n *= factor
+        self.km_m2 *= factor
+        self.price_m2 *= factor
+        self.cross_m2 *= factor
+
+    def to_dict(self):
+        """Return the statistics as a JSON serializable dict."""
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Rebuild statistics saved by to_dict.
+        
+        Args:
+            values (dict): n, km_mean, price_mean, km_m2, price_m2 and cross_m2.
+            
+        Returns:
+            SufficientStats: The restored statistics.
+        """
+        stats = cls()
+        for name in stats.__dict__:
+            setattr(stats, name, values[name])
+        return stats
+
+    @property
+    def km_std(self):
+        """Sample standard deviation of the mileage (ddof=1, like pandas)."""
+        return float(np.sqrt(self.km_m2 / (self.n - 1))) if self.n > 1 else float('nan')
+
+    @property
+    def price_std(self):
+        """Sample standard deviation of the price (ddof=1, like pandas)."""
+        return float(np.sqrt(self.price_m2 / (self.n - 1))) if self.n > 1 else float('nan')
+
+    def to_norm_stats(self):
+        """
+        Return the normalization statistics in the format of normalize_data.
+        
+        Returns:
+            dict: km_mean, km_std, price_mean and price_std.
+        """
+        return {
+            'km_mean': self.km_mean,
+            'km_std': self.km_std,
+            'price_mean': self.price_mean,
+            'price_std': self.price_std,
+            'features': ['km'],
+            'target': 'price'
         }
-    }
+
+
+def stream_statistics(filepath, chunksize=100000):
+    """
+    Function to read a CSV file in fixed-size chunks and accumulate its
+    sufficient statistics without loading the whole file in memory.
     
+    Args:
+        filepath (str): The path to the CSV file to be read.
+        chunksize (int): Number of rows read per chunk.
+        
+    Returns:
+        SufficientStats: The accumulated statistics,
+        or None if an error occurs.
+    """
+    stats = SufficientStats()
+    try:
+        for chunk in pd.read_csv(filepath, usecols=['km', 'price'], chunksize=chunksize):
+            stats.update(chunk['km'].to_numpy(dtype=np.float64),
+                         chunk['price'].to_numpy(dtype=np.float64))
+    except FileNotFoundError:
+        print(f"✗ Error: File '{filepath}' not found.")
+        return None
+    except Exception as e:
+        print(f"✗ Error streaming data: {e}")
+        return None
+    print(f"✓Length of data: {stats.n}")
+    print(f"  - KM: μ={stats.km_mean:.0f}, σ={stats.km_std:.0f}")
+    print(f"  - Prix: μ={stats.price_mean:.0f}, σ={stats.price_std:.0f}")
     return stats
+
+
+def iter_normalized_chunks(filepath, norm_stat, chunksize=100000):
+    """
+    Generator reading a CSV file in fixed-size chunks and yielding the
+    z-score normalized km and price arrays of each chunk.
+    
+    Args:
+        filepath (str): The path to the CSV file to be read.
+        norm_stat (dict): Normalization statistics (mean and std for km and price).
+        chunksize (int): Number of rows read per chunk.
+        
+    Yields:
+        Tuple: (X, y) normalized numpy arrays of the chunk.
+    """
+    for chunk in pd.read_csv(filepath, usecols=['km', 'price'], chunksize=chunksize):
+        X = (chunk['km'].to_numpy(dtype=np.float64) - norm_stat['km_mean']) / norm_stat['km_std']
+        y = (chunk['price'].to_numpy(dtype=np.float64) - norm_stat['price_mean']) / norm_stat['price_std']
+        yield X, y
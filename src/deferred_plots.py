@@ -0,0 +1,165 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    deferred_plots.py                                  :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:32:33 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:06:43 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module renders the training plots off the training hot path.
+Training only records snapshots of (iteration, theta0, theta1) through a
+telemetry callback, and a background thread renders the figures with
+object-oriented matplotlib figures on the Agg canvas (no pyplot global state,
+no window, no pause), alongside or after the fit. Scatters of more than
+visualization.MAX_SCATTER_POINTS rows are drawn as hexagonal bins, so large
+datasets render in seconds.
+matplotlib is only imported by the worker thread and the render functions,
+so recording snapshots costs no import when no figure is drawn.
+"""
+import queue
+import threading
+
+import numpy as np
+
+from basis import expand
+from visualization import draw_points, draw_cost_history
+
+PLOT_DPI = 300
+
+
+class FitSnapshots:
+    """
+    Parameters recorded during training, to be registered as a telemetry
+    callback: telemetry.add_callback(snapshots.record, every=10).
+    """
+    def __init__(self):
+        self.rows = []
+
+    def record(self, iteration, cost, theta):
+        """Telemetry callback storing the iteration and a copy of the parameters."""
+        self.rows.append((iteration, *np.asarray(theta, dtype=np.float64).tolist()))
+
+    def as_array(self):
+        """
+        Returns:
+            np.array: (n_snapshots, 1 + n_parameters) rows of (iteration, theta0, theta1, ...).
+        """
+        return np.array(self.rows, dtype=np.float64).reshape(len(self.rows), -1)
+
+
+class PlotWorker:
+    """
+    Background thread rendering figures submitted as render functions.
+    A render function receives a new Figure followed by its arguments; the
+    arrays it gets must not be modified by the caller afterwards.
+    """
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, render, filename, *args, figsize=(10, 6)):
+        """
+        Queue the rendering of a figure to filename.
+        
+        Args:
+            render (callable): render(fig, *args) drawing on the figure.
+            filename (str): The PNG file to write.
+            figsize (tuple): Size of the figure in inches.
+        """
+        self.jobs.put((render, filename, args, figsize))
+
+    def _run(self):
+        from matplotlib.figure import Figure
+
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            render, filename, args, figsize = job
+            try:
+                fig = Figure(figsize=figsize)
+                render(fig, *args)
+                fig.savefig(filename, dpi=PLOT_DPI, bbox_inches='tight')
+                print(f"✓ Plot saved as '{filename}'")
+            except Exception as e:
+                print(f"✗ Error rendering '{filename}': {e}")
+
+    def close(self):
+        """Wait until every queued figure is rendered."""
+        self.jobs.put(None)
+        self.thread.join()
+
+
+def decorate(ax, title, legend=False):
+    """Labels, title and grid shared by the km vs price figures."""
+    ax.set_xlabel('Mileage (km)', fontsize=12)
+    ax.set_ylabel('Price', fontsize=12)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    if legend:
+        ax.legend(fontsize=11)
+    ax.grid(True, alpha=0.3)
+    ax.figure.tight_layout()
+
+
+def regression_line(km, theta, stats, basis=None, n_points=100):
+    """
+    Points of the regression line in raw units over the mileage range, or of
+    the curve when the model was fitted on a basis spec (see basis.make_basis).
+    """
+    km_range = np.linspace(np.min(km), np.max(km), n_points)
+    km_normalized = (km_range - stats['km_mean']) / stats['km_std']
+    if basis is not None:
+        price_normalized = theta[0] + expand(km_normalized, basis) @ theta[1:]
+    else:
+        price_normalized = theta[0] + theta[1] * km_normalized
+    return km_range, price_normalized * stats['price_std'] + stats['price_mean']
+
+
+def render_data(fig, km, price, title="data visualization (km vs price)"):
+    """Render the km vs price points."""
+    ax = fig.add_subplot()
+    draw_points(ax, km, price, label='original data', density=True)
+    decorate(ax, title)
+
+
+def render_regression(fig, km, price, theta, stats, basis=None,
+                      title="Linear Regression Fit (km vs price)"):
+    """Render the points and the regression line of the normalized parameters theta."""
+    ax = fig.add_subplot()
+    draw_points(ax, km, price, label='original data', density=True)
+    ax.plot(*regression_line(km, theta, stats, basis), color='red', linewidth=2, label='Regression line')
+    decorate(ax, title, legend=True)
+
+
+def render_fit_snapshots(fig, km, price, snapshots, stats, basis=None, title="Regression Fit During Training"):
+    """
+    Render the points and the regression line of every snapshot, colored by
+    iteration, instead of one window per logged iteration.
+    
+    Args:
+        snapshots (np.array): Rows of (iteration, theta0, theta1, ...) from FitSnapshots.
+        basis (dict): The basis spec of the model, if any.
+    """
+    from matplotlib import cm, colormaps, colors
+
+    ax = fig.add_subplot()
+    draw_points(ax, km, price, label='original data', density=True)
+    iterations = snapshots[:, 0]
+    norm = colors.Normalize(iterations.min(), iterations.max())
+    cmap = colormaps['viridis']
+    for row in snapshots:
+        ax.plot(*regression_line(km, row[1:], stats, basis), linewidth=1.5, color=cmap(norm(row[0])))
+    fig.colorbar(cm.ScalarMappable(norm=norm, cmap=cmap), ax=ax, label='Iteration')
+    decorate(ax, title)
+
+
+def render_cost_history(fig, cost_history, title="Cost History During Training"):
+    """Render a list of costs or a CostHistory (with its envelope in 'ring' mode)."""
+    draw_cost_history(fig.add_subplot(), cost_history, title)
+    fig.tight_layout()
@@ -0,0 +1,224 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    evaluation.py                                      :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:33:58 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 14:33:58 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module evaluates a saved model on test sets of any size in a single
+pass and constant memory. The test file is read in chunks, predicted with the
+model's own normalization statistics (CompiledModel folds them into the
+parameters) and reduced into mergeable accumulators: the count, mean and
+sum of squared deviations of the target (Chan et al. merge) for SS_tot, the
+sums of squared and absolute residuals for SS_res, RMSE and MAE, and a
+log-bucketed quantile sketch of the residuals with a bounded relative error.
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import prepare_features
+from model_saver import CompiledModel
+
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch with a relative accuracy guarantee (the
+    DDSketch scheme): a value v is counted in the bucket ceil(log_γ |v|) of its
+    sign, γ = (1 + α) / (1 - α), so every quantile estimate is within a
+    relative error α of a true sample value. The buckets are preallocated
+    between min_value and max_value, so memory does not depend on the number
+    of values, and two sketches merge by adding their counts.
+    
+    Arguments:
+    relative_accuracy (float): α, the relative error of the quantiles.
+    min_value (float): Magnitudes below it are counted as zero.
+    max_value (float): Magnitudes above it are counted in the last bucket.
+    """
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9, max_value=1e12):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.offset = int(np.ceil(np.log(min_value) / self.log_gamma))
+        self.min_value = min_value
+        n_buckets = int(np.ceil(np.log(max_value) / self.log_gamma)) - self.offset + 1
+        self.positive = np.zeros(n_buckets, dtype=np.int64)
+        self.negative = np.zeros(n_buckets, dtype=np.int64)
+        self.zero = 0
+
+    @property
+    def count(self):
+        return int(self.positive.sum() + self.negative.sum()) + self.zero
+
+    def update(self, values):
+        """
+        Add an array of values to the sketch.
+        
+        Args:
+            values (np.array): The values, without NaN.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        magnitude = np.abs(values)
+        nonzero = magnitude >= self.min_value
+        self.zero += int(len(values) - np.count_nonzero(nonzero))
+        index = np.ceil(np.log(magnitude[nonzero]) / self.log_gamma).astype(np.int64) - self.offset
+        np.clip(index, 0, len(self.positive) - 1, out=index)
+        sign = values[nonzero] > 0
+        self.positive += np.bincount(index[sign], minlength=len(self.positive))
+        self.negative += np.bincount(index[~sign], minlength=len(self.negative))
+
+    def merge(self, other):
+        """Add the counts of another sketch built with the same parameters."""
+        self.positive += other.positive
+        self.negative += other.negative
+        self.zero += other.zero
+
+    def quantiles(self, qs=QUANTILES):
+        """
+        Estimate quantiles of the values seen.
+        
+        Args:
+            qs (tuple): The quantile levels, in [0, 1].
+            
+        Returns:
+            np.array: The estimated quantiles (NaN if the sketch is empty).
+        """
+        # Buckets in increasing order of value: negatives by decreasing magnitude, zero, positives
+        counts = np.concatenate((self.negative[::-1], [self.zero], self.positive))
+        if counts.sum() == 0:
+            return np.full(len(qs), np.nan)
+        magnitudes = 2 * self.gamma ** (np.arange(len(self.positive)) + self.offset) / (self.gamma + 1)
+        values = np.concatenate((-magnitudes[::-1], [0.0], magnitudes))
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs) * (cumulative[-1] - 1)
+        return values[np.searchsorted(cumulative, ranks, side='right')]
+
+
+class StreamingMetrics:
+    """
+    Mergeable accumulators of the regression metrics.
+    
+    Attributes:
+    n (int): Number of rows.
+    y_mean (float): Running mean of the target.
+    y_m2 (float): Σ(y - y_mean)², the total sum of squares.
+    ss_res (float): Σ(y - y_pred)².
+    sum_abs (float): Σ|y - y_pred|.
+    sketch (QuantileSketch): Sketch of the residuals y - y_pred.
+    """
+    def __init__(self, relative_accuracy=0.01):
+        self.n = 0
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+        self.ss_res = 0.0
+        self.sum_abs = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, y, y_pred):
+        """
+        Add a chunk of targets and predictions.
+        
+        Args:
+            y (np.array): true target values
+            y_pred (np.array): predicted target values
+        """
+        if len(y) == 0:
+            return
+        residuals = y - y_pred
+        chunk = StreamingMetrics.__new__(StreamingMetrics)
+        chunk.n = len(y)
+        chunk.y_mean = float(np.mean(y))
+        deviations = y - chunk.y_mean
+        chunk.y_m2 = float(deviations @ deviations)
+        chunk.ss_res = float(residuals @ residuals)
+        chunk.sum_abs = float(np.sum(np.abs(residuals)))
+        chunk.sketch = None
+        self.sketch.update(residuals)
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Merge another StreamingMetrics into this one (Chan et al. update of the mean and SS_tot)."""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.y_mean - self.y_mean
+        self.y_m2 += other.y_m2 + delta * delta * self.n * other.n / n
+        self.y_mean += delta * other.n / n
+        self.ss_res += other.ss_res
+        self.sum_abs += other.sum_abs
+        if other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        self.n = n
+
+    def results(self, qs=QUANTILES):
+        """
+        Returns:
+            dict: n, r2, rmse, mae and the residual quantiles {q: value}.
+        """
+        return {
+            'n': self.n,
+            'r2': 1 - self.ss_res / self.y_m2 if self.y_m2 > 0 else float('nan'),
+            'rmse': float(np.sqrt(self.ss_res / self.n)) if self.n else float('nan'),
+            'mae': self.sum_abs / self.n if self.n else float('nan'),
+            'quantiles': dict(zip(qs, self.sketch.quantiles(qs).tolist()))
+        }
+
+
+def evaluate_stream(params, filepath, chunksize=100000, relative_accuracy=0.01):
+    """
+    Evaluate a saved model on a CSV file read in chunks, normalizing with the
+    statistics stored in the model rather than the test set's own.
+    Rows with a missing or non-numeric feature or target are skipped.
+    
+    Args:
+        params (dict): The model parameters returned by load_model.
+        filepath (str): The test CSV file.
+        chunksize (int): Number of rows read per chunk.
+        relative_accuracy (float): Relative error of the residual quantiles.
+        
+    Returns:
+        Tuple: (StreamingMetrics, number of skipped rows), or None if the file cannot be read.
+    """
+    model = CompiledModel(params)
+    target = params['target']
+    metrics = StreamingMetrics(relative_accuracy)
+    skipped = 0
+    try:
+        for chunk in pd.read_csv(filepath, chunksize=chunksize):
+            chunk = prepare_features(chunk, model.features, params['categorical'])
+            X = np.column_stack([pd.to_numeric(chunk[f], errors='coerce').to_numpy(dtype=np.float64)
+                                 for f in model.features])
+            y = pd.to_numeric(chunk[target], errors='coerce').to_numpy(dtype=np.float64)
+            valid = ~(np.isnan(y) | np.isnan(X).any(axis=1))
+            skipped += int(len(y) - np.count_nonzero(valid))
+            metrics.update(y[valid], model.predict(X[valid]))
+    except FileNotFoundError:
+        print(f"✗ Error: File '{filepath}' not found.")
+        return None
+    except (KeyError, pd.errors.ParserError) as e:
+        print(f"✗ Error reading '{filepath}': {e}")
+        return None
+    return metrics, skipped
+
+
+def display_metrics(results, skipped=0):
+    """Print the metrics returned by StreamingMetrics.results."""
+    print("\n" + "="*60)
+    print("STREAMING EVALUATION".center(60))
+    print("="*60)
+    print(f"  Rows:       {results['n']:>16,}")
+    if skipped:
+        print(f"  Skipped:    {skipped:>16,}  (missing or non-numeric values)")
+    print(f"  R²:         {results['r2']:>16.6f}")
+    print(f"  RMSE:       {results['rmse']:>16.4f}")
+    print(f"  MAE:        {results['mae']:>16.4f}")
+    print("  Residual quantiles:")
+    for q, value in results['quantiles'].items():
+        print(f"    p{q * 100:<6g}  {value:>16.4f}")
+    print("="*60)
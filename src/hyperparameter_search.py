@@ -0,0 +1,249 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    hyperparameter_search.py                           :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:20:01 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:04:02 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module searches the gradient descent hyperparameters (learning rate,
+tolerance and number of iterations) of the linear regression model.
+Configurations are drawn from a grid or at random and trained in parallel on
+a process pool. The normalized training and validation arrays are placed once
+in shared memory and every worker maps them instead of receiving a pickled
+copy per task. Each worker also computes once the Gram moments of the
+training arrays, so every gradient descent iteration is O(1) in the number
+of rows (LinearRegression.gram_gradient_descent). Configurations are ranked
+by validation R² (precision_main.score) and by time to convergence.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from data_loader import load_data, normalize_data
+from linear_regression import LinearRegression, gram_moments
+from model_saver import save_model
+from precision_main import score
+
+# Arrays of the worker processes, mapped on the shared memory block
+_shared = {}
+
+
+def share_arrays(arrays):
+    """
+    Copy arrays into one shared memory block.
+    
+    Args:
+        arrays (dict): {name: numpy array} of float64 arrays.
+        
+    Returns:
+        Tuple: (SharedMemory block, layout) where layout lists (name, offset, shape)
+        so the workers can rebuild the arrays.
+    """
+    total = sum(a.nbytes for a in arrays.values())
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        view = np.ndarray(array.shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+        view[...] = array
+        layout.append((name, offset, array.shape))
+        offset += array.nbytes
+    return shm, layout
+
+
+def attach_arrays(shm_name, layout):
+    """Process pool initializer: map the shared arrays in the worker and compute the training moments."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _shared['shm'] = shm
+    for name, offset, shape in layout:
+        _shared[name] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+    _shared['moments'] = gram_moments(_shared['X_train'], _shared['y_train'])
+
+
+def evaluate_config(config):
+    """
+    Train one configuration on the shared training arrays and score it on the
+    validation arrays.
+    
+    Args:
+        config (dict): learning_rate, tolerance and n_iterations.
+        
+    Returns:
+        dict: The configuration with its validation R², training time,
+        number of iterations run, convergence flag and learned theta.
+    """
+    model = LinearRegression(learning_rate=config['learning_rate'], tolerance=config['tolerance'],
+                             n_iterations=config['n_iterations'])
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        model.gram_gradient_descent(_shared['X_train'], _shared['y_train'], moments=_shared['moments'])
+        elapsed = time.perf_counter() - start
+    n_features = _shared['X_train'].shape[1]
+    params = {f'theta{i}': float(t) for i, t in enumerate(model.theta)}
+    params['features'] = [f'x{i}' for i in range(n_features)]
+    r2 = float(score(params, _shared['X_val'], _shared['y_val']))
+    return dict(config, r2=r2 if np.isfinite(r2) else float('-inf'), time_s=elapsed,
+                iterations=config['n_iterations'] if model.converged_iteration is None
+                else model.converged_iteration + 1,
+                converged=model.converged_iteration is not None,
+                theta=[float(t) for t in model.theta])
+
+
+def grid_configs(learning_rates, tolerances, n_iterations):
+    """
+    Every combination of the given values.
+    
+    Returns:
+        list: Configuration dicts.
+    """
+    return [{'learning_rate': lr, 'tolerance': tol, 'n_iterations': n}
+            for lr, tol, n in itertools.product(learning_rates, tolerances, n_iterations)]
+
+
+def random_configs(n_configs, learning_rates, tolerances, n_iterations, seed=None):
+    """
+    Draw configurations at random: learning rate and tolerance log-uniformly
+    and the number of iterations uniformly, between the smallest and largest given values.
+    
+    Returns:
+        list: Configuration dicts.
+    """
+    rng = np.random.default_rng(seed)
+    def log_uniform(values):
+        return 10 ** rng.uniform(np.log10(min(values)), np.log10(max(values)), n_configs)
+    lrs = log_uniform(learning_rates)
+    tols = log_uniform(tolerances)
+    iters = rng.integers(min(n_iterations), max(n_iterations) + 1, n_configs)
+    return [{'learning_rate': float(lr), 'tolerance': float(tol), 'n_iterations': int(n)}
+            for lr, tol, n in zip(lrs, tols, iters)]
+
+
+def split_data(data, val_fraction, seed=None):
+    """
+    Shuffle the rows and split them into a training and a validation set.
+    
+    Returns:
+        Tuple: (train, validation) DataFrames.
+    """
+    perm = np.random.default_rng(seed).permutation(len(data))
+    n_val = max(1, int(round(len(data) * val_fraction)))
+    return data.iloc[perm[n_val:]], data.iloc[perm[:n_val]]
+
+
+def parse_floats(text):
+    """Parse a comma-separated list of numbers."""
+    return [float(v) for v in text.split(',')]
+
+
+def main(args):
+    """Main function to run the hyperparameter search."""
+    data_file = args.data_file if args.data_file else './data/data.csv'
+    data = load_data(data_file)
+    if data is None:
+        print("✗ Failed to load data. Exiting.")
+        return 1
+    features = args.features.split(',')
+    train, validation = split_data(data, args.val_fraction, seed=args.seed)
+    # The validation set is normalized with the training statistics
+    normalized_train, norm_stat = normalize_data(train, features=features, target=args.target)
+    X_val = ((validation[features] - [norm_stat[f'{f}_mean'] for f in features])
+             / [norm_stat[f'{f}_std'] for f in features]).to_numpy(dtype=np.float64)
+    y_val = ((validation[args.target] - norm_stat[f'{args.target}_mean'])
+             / norm_stat[f'{args.target}_std']).to_numpy(dtype=np.float64)
+
+    learning_rates = parse_floats(args.learning_rates)
+    tolerances = parse_floats(args.tolerances)
+    n_iterations = [int(v) for v in parse_floats(args.n_iterations)]
+    if args.mode == 'grid':
+        configs = grid_configs(learning_rates, tolerances, n_iterations)
+    else:
+        configs = random_configs(args.n_configs, learning_rates, tolerances, n_iterations, seed=args.seed)
+    workers = args.workers if args.workers else os.cpu_count()
+    print(f"\n✓Searching {len(configs)} configurations ({args.mode}) on {workers} processes...")
+    print(f"  - train: {len(train)} rows, validation: {len(validation)} rows")
+
+    shm, layout = share_arrays({
+        'X_train': normalized_train[features].to_numpy(dtype=np.float64),
+        'y_train': normalized_train[args.target].to_numpy(dtype=np.float64),
+        'X_val': X_val,
+        'y_val': y_val
+    })
+    try:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_arrays,
+                                 initargs=(shm.name, layout)) as pool:
+            results = list(pool.map(evaluate_config, configs))
+        elapsed = time.perf_counter() - start
+    finally:
+        shm.close()
+        shm.unlink()
+    print(f"✓Search done in {elapsed:.2f}s")
+
+    # Best R² first, the fastest training breaking ties
+    results.sort(key=lambda r: (-round(r['r2'], 6), r['time_s']))
+    print("\n" + "=" * 84)
+    print(f"{'rank':>4} {'learning_rate':>14} {'tolerance':>10} {'n_iter':>7} {'iters run':>9} "
+          f"{'conv':>5} {'time (s)':>9} {'val R²':>10}")
+    print("=" * 84)
+    for rank, r in enumerate(results[:args.top], start=1):
+        print(f"{rank:>4} {r['learning_rate']:>14.4g} {r['tolerance']:>10.1e} {r['n_iterations']:>7} "
+              f"{r['iterations']:>9} {'yes' if r['converged'] else 'no':>5} {r['time_s']:>9.4f} {r['r2']:>10.6f}")
+    best = results[0]
+    close = [r for r in results if r['converged'] and r['r2'] >= best['r2'] - args.r2_tolerance]
+    if close:
+        fastest = min(close, key=lambda r: r['time_s'])
+        print(f"\n✓Fastest converged configuration within {args.r2_tolerance:g} R² of the best: "
+              f"learning_rate={fastest['learning_rate']:.4g}, tolerance={fastest['tolerance']:.1e}, "
+              f"n_iterations={fastest['n_iterations']} ({fastest['iterations']} iterations, "
+              f"{fastest['time_s']:.4f}s, R²={fastest['r2']:.6f})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"✓ Results saved: {args.output}")
+    if args.save_model:
+        model = LinearRegression(learning_rate=best['learning_rate'], tolerance=best['tolerance'],
+                                 n_iterations=best['n_iterations'])
+        model.theta = np.array(best['theta'])
+        save_model(model, norm_stat, filename=args.save_model)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for the gradient descent.")
+    parser.add_argument('--data_file', type=str, help='Path to the CSV file containing the dataset')
+    parser.add_argument('--features', type=str, default='km', help='Comma-separated numeric feature columns')
+    parser.add_argument('--target', type=str, default='price', help='Target column to predict')
+    parser.add_argument('--mode', type=str, choices=('grid', 'random'), default='grid',
+                        help='Try every combination (grid) or draw --n_configs at random between the bounds')
+    parser.add_argument('--learning_rates', type=str, default='0.001,0.003,0.01,0.03,0.1,0.3',
+                        help='Comma-separated learning rates (bounds in random mode)')
+    parser.add_argument('--tolerances', type=str, default='1e-4,1e-6,1e-8',
+                        help='Comma-separated tolerances (bounds in random mode)')
+    parser.add_argument('--n_iterations', type=str, default='100,1000,10000',
+                        help='Comma-separated iteration limits (bounds in random mode)')
+    parser.add_argument('--n_configs', type=int, default=50, help='Number of configurations in random mode')
+    parser.add_argument('--val_fraction', type=float, default=0.2, help='Fraction of the rows used for validation')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the split and of the random search')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes (default: all cores)')
+    parser.add_argument('--top', type=int, default=10, help='Number of configurations printed')
+    parser.add_argument('--r2_tolerance', type=float, default=1e-4,
+                        help='R² margin used to pick the fastest near-best configuration')
+    parser.add_argument('--output', type=str, help='JSON file where every result is written')
+    parser.add_argument('--save_model', type=str, help='Save the best model to this path')
+    args = parser.parse_args()
+    sys.exit(main(args))
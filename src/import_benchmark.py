@@ -0,0 +1,148 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    import_benchmark.py                                :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:42:36 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 14:42:36 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module benchmarks the import time of the entry points with
+`python -X importtime`, each in a fresh interpreter as a short-lived batch
+worker would, and guards the lightweight paths: the modules below must not
+load pandas or matplotlib, whose import alone costs hundreds of milliseconds.
+The results are written as JSON and can be compared with a previous run
+(--baseline), exiting with 1 on a forbidden import or a regression.
+
+Usage:
+    python src/import_benchmark.py --repeat 5 --output import_times.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Entry modules and the heavy packages they must not import
+IMPORT_GUARDS = {
+    'model_saver': ('pandas', 'matplotlib'),
+    'model_registry': ('pandas', 'matplotlib'),
+    'predict_main': ('pandas', 'matplotlib'),
+    'predict_server': ('pandas', 'matplotlib'),
+    'linear_regression': ('pandas', 'matplotlib'),
+    'linear_regression_main': ('matplotlib',),
+    'precision_main': ('matplotlib',),
+}
+
+
+def import_time(module, directory):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+    
+    Args:
+        module (str): The module to import.
+        directory (str): The directory of the module (put first on sys.path).
+        
+    Returns:
+        Tuple: (total import time in seconds, set of the top-level packages imported).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=directory, capture_output=True, text=True, check=True)
+    total_us = 0
+    packages = set()
+    # Lines of "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        packages.add(name.split('.')[0])
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1e6, packages
+
+
+def benchmark_imports(directory, repeat=3):
+    """
+    Measure the import time of every module of IMPORT_GUARDS, keeping the best of repeat runs.
+    
+    Returns:
+        list: One dict per module with import_s and the forbidden packages it loaded.
+    """
+    results = []
+    for module, forbidden in IMPORT_GUARDS.items():
+        best = float('inf')
+        for _ in range(repeat):
+            seconds, packages = import_time(module, directory)
+            best = min(best, seconds)
+        loaded = sorted(set(forbidden) & packages)
+        print(f"  {module:<24} {best * 1e3:8.1f} ms"
+              f"{'  ✗ imports ' + ', '.join(loaded) if loaded else ''}")
+        results.append({'module': module, 'import_s': best, 'forbidden_imports': loaded})
+    return results
+
+
+def compare(results, baseline_file, threshold):
+    """
+    Compare the import times with a previous run.
+    
+    Returns:
+        list: The (module, ratio) of the regressions.
+    """
+    with open(baseline_file) as f:
+        baseline = {r['module']: r for r in json.load(f)['results']}
+    regressions = []
+    for r in results:
+        previous = baseline.get(r['module'])
+        if previous and previous['import_s'] > 0:
+            ratio = r['import_s'] / previous['import_s']
+            if ratio > threshold:
+                regressions.append((r['module'], ratio))
+    return regressions
+
+
+def main(args):
+    """Main function to measure the import times and write the JSON report."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    print(f"\n✓Import times (best of {args.repeat})...")
+    print("-" * 60)
+    results = benchmark_imports(directory, repeat=args.repeat)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\n✓ Import times saved: {args.output}")
+
+    status = 0
+    if any(r['forbidden_imports'] for r in results):
+        print("✗ A lightweight entry point imports pandas or matplotlib at load time.")
+        status = 1
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for module, ratio in regressions:
+            print(f"✗ Regression: import of {module} is {ratio:.2f}x slower than the baseline")
+        if regressions:
+            status = 1
+        else:
+            print(f"✓ No regression above {args.threshold:.2f}x the baseline.")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and guard the import time of the entry points.")
+    parser.add_argument('--repeat', type=int, default=3, help='Imports per module, the best time is kept.')
+    parser.add_argument('--output', type=str, default='import_times.json', help='JSON file where the results are written.')
+    parser.add_argument('--baseline', type=str, help='Previous results to compare with; exits with 1 on regression.')
+    parser.add_argument('--threshold', type=float, default=1.5, help='Slowdown ratio reported as a regression.')
+    args = parser.parse_args()
+    sys.exit(main(args))
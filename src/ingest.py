@@ -0,0 +1,189 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    ingest.py                                          :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:31:08 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:01:57 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module parses large, dirty CSV files in parallel and without aborting
+on bad rows. The file is split into byte ranges aligned on line ends, each
+range is parsed on a thread pool (the pandas C parser releases the GIL), and
+the schema columns (km and price by default) are validated: rows with a
+missing, non-numeric or negative value, or with too many fields, are written
+to a quarantine CSV file with the reason instead of failing the whole load.
+The valid rows of every range are copied once into preallocated columns.
+Fields must not contain quoted line breaks, since ranges are split on lines.
+"""
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Columns validated (numeric, present and non-negative) and their dtype
+DEFAULT_SCHEMA = {'km': np.float64, 'price': np.float64}
+DEFAULT_CHUNK_BYTES = 64 * 2**20
+
+
+def byte_ranges(filepath, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Split a CSV file into byte ranges of about chunk_bytes, each starting
+    right after a line end.
+    
+    Args:
+        filepath (str): The path to the CSV file.
+        chunk_bytes (int): Target size of a range.
+        
+    Returns:
+        Tuple: (header line, list of (start, end) byte offsets of the data ranges).
+    """
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        header = f.readline()
+        starts = [f.tell()]
+        while starts[-1] + chunk_bytes < size:
+            f.seek(starts[-1] + chunk_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            starts.append(f.tell())
+    return header, list(zip(starts, starts[1:] + [size]))
+
+
+def parse_range(filepath, start, end, columns, schema):
+    """
+    Parse and validate one byte range of a CSV file.
+    
+    Args:
+        filepath (str): The path to the CSV file.
+        start (int): Offset of the first byte of the range.
+        end (int): Offset after the last byte of the range.
+        columns (list): The column names of the file header.
+        schema (dict): {column: dtype} of the validated columns.
+        
+    Returns:
+        Tuple: (valid, rejected) where valid is a DataFrame of the valid rows
+        and rejected a DataFrame of the quarantined rows with a 'reason' column.
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        raw = f.read(end - start)
+    malformed = []
+    # pandas would turn the extra leading fields of a first line into an index
+    # and shift the columns of the range: quarantine that line beforehand
+    first_end = raw.find(b'\n') + 1 or len(raw)
+    first = next(csv.reader([raw[:first_end].decode('utf-8', errors='replace')]), [])
+    if len(first) > len(columns):
+        malformed.append(first)
+        raw = raw[first_end:]
+    try:
+        chunk = pd.read_csv(io.BytesIO(raw), header=None, names=columns, index_col=False,
+                            on_bad_lines='error', low_memory=False)
+    except pd.errors.EmptyDataError:
+        # The range only held a malformed first line
+        chunk = pd.DataFrame(columns=columns)
+    except pd.errors.ParserError:
+        # Rare dirty ranges fall back to the python engine to keep the bad lines
+        # (index_col=False would make the python engine truncate the bad lines)
+        chunk = pd.read_csv(io.BytesIO(raw), header=None, names=columns, engine='python',
+                            on_bad_lines=lambda fields: malformed.append(fields) and None)
+    # Index + 1 in reasons of the first failing check of each row, 0 if valid
+    code = np.zeros(len(chunk), dtype=np.int16)
+    reasons = []
+    parsed = {}
+    for column, dtype in schema.items():
+        values = chunk[column]
+        checks = []
+        if values.dtype.kind not in 'if':
+            numeric = pd.to_numeric(values, errors='coerce')
+            checks.append((f'non_numeric:{column}', (numeric.isna() & values.notna()).to_numpy()))
+            values = numeric
+        values = values.to_numpy(dtype=np.float64)
+        checks.append((f'missing:{column}', np.isnan(values)))
+        checks.append((f'negative:{column}', values < 0))
+        for reason, failed in checks:
+            reasons.append(reason)
+            code[failed & (code == 0)] = len(reasons)
+        parsed[column] = values.astype(dtype, copy=False)
+    bad = code != 0
+    # The quarantine keeps the rows as read, the valid rows get the schema dtypes
+    rejected = chunk[bad].assign(reason=np.array(reasons, dtype=object)[code[bad] - 1])
+    if malformed:
+        lines = pd.DataFrame([fields[:len(columns)] for fields in malformed], columns=columns)
+        lines['reason'] = [f'malformed:{len(fields)}_fields' for fields in malformed]
+        rejected = pd.concat([rejected, lines], ignore_index=True)
+    if bad.any():
+        chunk = chunk[~bad]
+        parsed = {column: values[~bad] for column, values in parsed.items()}
+    return chunk.assign(**parsed), rejected
+
+
+def concat_columns(frames, columns):
+    """
+    Concatenate DataFrames into one, copying every column once into a
+    preallocated array (pd.concat may go through intermediate blocks).
+    Extension dtypes (e.g. the str dtype of text columns) have no NumPy
+    equivalent and are concatenated by pandas.
+    """
+    total = sum(len(frame) for frame in frames)
+    data = {}
+    for column in columns:
+        dtypes = {frame[column].dtype for frame in frames if len(frame)}
+        dtype = dtypes.pop() if len(dtypes) == 1 else object
+        if not isinstance(dtype, np.dtype):
+            data[column] = pd.concat([frame[column] for frame in frames], ignore_index=True)
+            continue
+        values = np.empty(total, dtype=dtype)
+        offset = 0
+        for frame in frames:
+            values[offset:offset + len(frame)] = frame[column].to_numpy()
+            offset += len(frame)
+        data[column] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def ingest_csv(filepath, schema=None, quarantine_file=None, workers=None,
+               chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Load a CSV file in parallel byte ranges, validating the schema columns.
+    
+    Args:
+        filepath (str): The path to the CSV file.
+        schema (dict): {column: dtype} of the columns to validate (default: km and price as float64).
+        quarantine_file (str): CSV file receiving the rejected rows and their reason
+        (default: '<file>.quarantine.csv' next to the source).
+        workers (int): Number of parsing threads (default: one per core).
+        chunk_bytes (int): Size of the byte ranges.
+        
+    Returns:
+        pd.DataFrame: The valid rows, in file order.
+    """
+    schema = DEFAULT_SCHEMA if schema is None else schema
+    header, ranges = byte_ranges(filepath, chunk_bytes)
+    columns = [name.strip() for name in header.decode().strip().split(',')]
+    missing = [column for column in schema if column not in columns]
+    if missing:
+        raise ValueError(f"missing column(s) in '{filepath}': {', '.join(missing)}")
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(lambda r: parse_range(filepath, r[0], r[1], columns, schema), ranges))
+    data = concat_columns([valid for valid, _ in results], columns)
+
+    rejected = [bad for _, bad in results if len(bad)]
+    n_rejected = sum(len(bad) for bad in rejected)
+    print(f"✓Ingested {len(data)} rows in {len(ranges)} ranges")
+    if n_rejected:
+        quarantine_file = quarantine_file or f"{os.path.splitext(filepath)[0]}.quarantine.csv"
+        quarantine = pd.concat(rejected, ignore_index=True)
+        quarantine.to_csv(quarantine_file, index=False)
+        print(f"  - {n_rejected} invalid rows quarantined: {quarantine_file}")
+        for reason, count in quarantine['reason'].value_counts().items():
+            print(f"    {reason}: {count}")
+    return data
@@ -0,0 +1,224 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    instrumentation.py                                 :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:25:26 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:05:56 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module measures where the training time goes: per-phase timings,
+iteration telemetry (iterations per second, convergence iteration), peak
+memory and callbacks invoked every N iterations. The measures are exported
+as JSON lines or in the Prometheus text format.
+It also runs any entry point under cProfile or tracemalloc:
+
+    python src/instrumentation.py --profile cprofile src/predict_main.py --model_file m.json
+
+Nothing is measured unless a Telemetry object is attached: the training loops
+only test `self.telemetry is not None`.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import runpy
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+PROFILERS = ('cprofile', 'tracemalloc')
+EXPORT_FORMATS = ('jsonl', 'prometheus')
+METRIC_PREFIX = 'linear_regression'
+
+
+def peak_memory_mb():
+    """Peak resident memory of the process in MB."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere (see benchmark.peak_rss_mb)
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+class Telemetry:
+    """
+    Collector of the measures of one training run.
+    
+    Attributes:
+    phases (dict): Seconds spent in each phase, in execution order.
+    metrics (dict): Scalar measures (iterations, convergence iteration, ...).
+    events (list): Records appended by callbacks (e.g. one per logged iteration).
+    callbacks (list): (callback, every) pairs, see add_callback.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.metrics = {}
+        self.events = []
+        self.callbacks = []
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager adding the wall time of its block to the phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_callback(self, callback, every=1):
+        """
+        Register callback(iteration, cost, theta), invoked every `every` iterations
+        (epochs for the sgd solver) by the training loops.
+        """
+        self.callbacks.append((callback, every))
+
+    def iteration(self, iteration, cost, theta):
+        """Called by the training loops after each iteration."""
+        for callback, every in self.callbacks:
+            if iteration % every == 0:
+                callback(iteration, cost, theta)
+
+    def log_iterations(self, every):
+        """Add a callback recording the cost and parameters every `every` iterations as events."""
+        self.add_callback(lambda iteration, cost, theta: self.events.append(
+            {'iteration': iteration, 'cost': float(cost), 'theta': [float(t) for t in theta]}), every)
+
+    def record_fit(self, model):
+        """
+        Record the iteration telemetry of a fitted model; the 'fit' phase must
+        have been timed to derive the iterations per second.
+        """
+        iterations = len(model.cost_history)
+        self.metrics['iterations'] = iterations
+        self.metrics['converged_iteration'] = model.converged_iteration
+        if self.phases.get('fit'):
+            self.metrics['iterations_per_second'] = iterations / self.phases['fit']
+        if model.cost_history:
+            self.metrics['final_cost'] = float(model.cost_history.last)
+
+    def snapshot(self):
+        """Return every measure as one JSON serializable dict."""
+        return {
+            'timestamp': time.time(),
+            'phases': self.phases,
+            'metrics': {**self.metrics, 'peak_memory_mb': peak_memory_mb()},
+            'events': self.events
+        }
+
+    def to_prometheus(self):
+        """
+        Format the measures in the Prometheus text exposition format
+        (e.g. for the node_exporter textfile collector).
+        """
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {METRIC_PREFIX}_phase_seconds gauge"]
+        for name, seconds in snapshot['phases'].items():
+            lines.append(f'{METRIC_PREFIX}_phase_seconds{{phase="{name}"}} {seconds:.6f}')
+        for name, value in snapshot['metrics'].items():
+            if value is None:
+                continue
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {float(value):.6g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename, fmt='jsonl'):
+        """
+        Write the measures to a file: one JSON line appended per run ('jsonl'),
+        or the whole file rewritten in the Prometheus text format ('prometheus').
+        """
+        if fmt == 'prometheus':
+            with open(filename, 'w') as f:
+                f.write(self.to_prometheus())
+        else:
+            with open(filename, 'a') as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+        print(f"✓ Telemetry saved: {filename}")
+
+    def display(self):
+        """Print the phase timings and the metrics."""
+        print("\n" + "="*60)
+        print("TELEMETRY".center(60))
+        print("="*60)
+        for name, seconds in self.phases.items():
+            print(f"  {name:<24}{seconds:>12.4f} s")
+        for name, value in self.snapshot()['metrics'].items():
+            if value is not None:
+                print(f"  {name:<24}{value:>12.6g}")
+        print("="*60)
+
+
+def timed(telemetry, name):
+    """Time the block as the phase `name` of telemetry, or do nothing when telemetry is None."""
+    return telemetry.phase(name) if telemetry is not None else nullcontext()
+
+
+def run_profiled(func, *args, profiler='cprofile', output=None, top=20):
+    """
+    Call func(*args) under cProfile or tracemalloc and print the top entries.
+    
+    Args:
+        func (callable): The entry point to run.
+        profiler (str): 'cprofile' (time per function) or 'tracemalloc'
+        (allocations per line and peak traced memory).
+        output (str): Optional file receiving the cProfile stats (for snakeviz,
+        pstats, ...) or the tracemalloc snapshot.
+        top (int): Number of entries printed.
+        
+    Returns:
+        The return value of func.
+    """
+    if profiler == 'tracemalloc':
+        tracemalloc.start()
+        try:
+            result = func(*args)
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\n✓Peak traced memory: {peak / 2**20:.2f} MB")
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f"  {stat}")
+            if output:
+                snapshot.dump(output)
+        return result
+
+    profile = cProfile.Profile()
+    try:
+        result = profile.runcall(func, *args)
+    finally:
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(top)
+        print(stream.getvalue())
+        if output:
+            profile.dump_stats(output)
+    return result
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a script of the project under a profiler.")
+    parser.add_argument('--profile', type=str, choices=PROFILERS, default='cprofile', help='Profiler')
+    parser.add_argument('--output', type=str, help='File receiving the profile data')
+    parser.add_argument('--top', type=int, default=20, help='Number of entries printed')
+    parser.add_argument('script', help='The script to run, e.g. src/linear_regression_main.py')
+    parser.add_argument('script_args', nargs=argparse.REMAINDER, help='Arguments of the script')
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.script_args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        run_profiled(runpy.run_path, args.script, None, '__main__',
+                     profiler=args.profile, output=args.output, top=args.top)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
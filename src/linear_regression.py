@@ -6,19 +6,228 @@
 #    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/05 18:04:09 by tissad            #+#    #+#              #
-#    Updated: 2026/02/06 15:00:46 by tissad           ###   ########.fr        #
+#    Updated: 2026/10/18 15:05:18 by tissad           ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
 """
 This module implements a simple linear regression model using gradient descent.
+The model learns a parameter vector theta = [theta0, theta1, ..., thetaN] over
+N feature columns, every update being a single matrix-vector product on the
+design matrix [1, X].
 It includes functions to compute the cost function, perform gradient descent, and
 make predictions based on the learned parameters. 
+Closed-form solvers (normal equation and least squares) are also available
+to compute the parameters in a single vectorized pass, as well as a
+mini-batch / stochastic gradient descent engine with learning-rate schedules
+and momentum or Adam updates.
+The data can be kept in float32 (dtype option): the Gram moments, the normal
+equation and the scores are then accumulated in float64 over blocks of rows,
+and check_precision compares the fit with a float64 one.
+Robust solvers (Huber loss by IRLS, RANSAC scoring thousands of candidate
+lines in one matrix product) limit the pull of bogus rows on the fit.
+A single feature can be expanded on a polynomial or spline basis (basis option,
+see basis.py): the expanded design matrix is computed once and cached, or,
+above BASIS_CACHE_CELLS, generated block by block into the Gram moments.
+A km -> price model fitted from sufficient statistics can be updated
+incrementally with new rows (partial_fit) without reprocessing the history.
 The model is designed to work with normalized data.
 """
+import contextlib
+import copy
+import io
 import numpy as np
-import matplotlib.pyplot as plt
-from visualization import plot_regression
+from cost_history import CostHistory, HISTORY_MODES
+from basis import expand, basis_size
+
+SOLVERS = ('gd', 'normal', 'lstsq', 'sgd', 'huber', 'ransac')
+# Solvers that do not minimize the squared error: their fits cannot be updated by partial_fit
+ROBUST_SOLVERS = ('huber', 'ransac')
+LR_SCHEDULES = ('constant', 'step', 'exponential', 'cosine')
+OPTIMIZERS = ('sgd', 'momentum', 'adam')
+GD_KERNELS = ('gram', 'reference')
+DTYPES = ('float64', 'float32')
+
+# Rows per block of the float64 reductions over reduced-precision data
+BLOCK_ROWS = 65536
+
+# Largest expanded design matrix (rows x basis columns) kept in memory
+BASIS_CACHE_CELLS = 2**24
+
+# Consistency factor of the median absolute deviation for normal residuals
+MAD_SCALE = 1.4826
+# Largest (candidates x rows) residual matrix scored at once by RANSAC
+RANSAC_BATCH_CELLS = 2**23
+
+# Adam hyperparameters (Kingma & Ba defaults)
+ADAM_BETA1 = 0.9
+ADAM_BETA2 = 0.999
+ADAM_EPSILON = 1e-8
+
+
+def design_matrix(X, dtype=np.float64):
+    """
+    Build the design matrix [1, X] of a feature array.
+    
+    Arguments:
+    X (numpy array): The input feature values, of shape (m,) for a single
+    feature or (m, n_features).
+    dtype (np.dtype): The dtype of the design matrix.
+    
+    Returns:
+    numpy array: The (m, n_features + 1) design matrix with a leading column of ones.
+    """
+    X = np.asarray(X, dtype=dtype)
+    if X.ndim == 1:
+        X = X[:, np.newaxis]
+    design = np.empty((X.shape[0], X.shape[1] + 1), dtype=dtype)
+    design[:, 0] = 1.0
+    design[:, 1:] = X
+    return design
+
+def iter_blocks(X, y, block_rows=BLOCK_ROWS, basis=None):
+    """
+    Yield float64 (design, y) blocks of at most block_rows rows, so that
+    reductions over float32 data are accumulated in float64 with bounded
+    temporaries. With a basis spec, X is expanded one block at a time.
+    """
+    for start in range(0, len(y), block_rows):
+        X_block = X[start:start + block_rows]
+        if basis is not None:
+            X_block = expand(X_block, basis)
+        yield (design_matrix(X_block),
+               np.asarray(y[start:start + block_rows], dtype=np.float64))
+
+
+def gram_moments(X, y, basis=None):
+    """
+    Precompute, in one pass over the data, the moments the gradient and the
+    cost of least squares depend on: the Gram matrix DᵀD / m of the design
+    matrix D = [1, X], Dᵀy / m and yᵀy / m (accumulated in float64).
+    
+    Arguments:
+    X (numpy array): The input feature values, (m,) or (m, n_features).
+    y (numpy array): The target values.
+    basis (dict): Basis spec expanding the single feature of X block by block.
+    
+    Returns:
+    Tuple: (gram, moment, sq) of shapes (n+1, n+1), (n+1,) and scalar.
+    """
+    gram, moment, sq = 0.0, 0.0, 0.0
+    for design, y_block in iter_blocks(X, y, basis=basis):
+        gram = gram + design.T @ design
+        moment = moment + design.T @ y_block
+        sq += float(y_block @ y_block)
+    m = len(y)
+    return gram / m, moment / m, sq / m
+
+
+def r2_score(theta, X, y, basis=None):
+    """
+    Coefficient of determination of the parameters theta on (X, y),
+    accumulated in float64 over blocks of rows.
+    
+    Returns:
+    float: R² = 1 - SS_res / SS_tot.
+    """
+    y_mean = float(np.mean(y, dtype=np.float64))
+    ss_res = ss_tot = 0.0
+    for design, y_block in iter_blocks(X, y, basis=basis):
+        errors = design @ theta - y_block
+        ss_res += float(errors @ errors)
+        ss_tot += float(np.sum((y_block - y_mean) ** 2))
+    return 1 - ss_res / ss_tot
+
+
+def robust_scale(residuals):
+    """Robust standard deviation of residuals: 1.4826 * median(|r - median(r)|)."""
+    scale = MAD_SCALE * np.median(np.abs(residuals - np.median(residuals)))
+    return scale if scale > 0 else float(np.std(residuals)) or 1.0
+
+
+def precision_rows(n_rows, max_rows, seed=None):
+    """
+    Draw the rows the precision check of a large fit is run on.
+    
+    Arguments:
+    n_rows (int): The number of training rows.
+    max_rows (int): The maximum number of rows of the check (0 or None: all rows).
+    seed (int): Seed of the sample.
+    
+    Returns:
+    numpy array: The sorted row indices, or None to check on every row.
+    """
+    if not max_rows or n_rows <= max_rows:
+        return None
+    return np.sort(np.random.default_rng(seed).choice(n_rows, max_rows, replace=False))
+
+
+def refit_copy(model, X, y, dtype):
+    """
+    Fit a copy of the model, from the initial parameters, leaving the model unchanged.
+    
+    Arguments:
+    model (LinearRegression): The model to copy.
+    X (numpy array): The input feature values (normalized).
+    y (numpy array): The target values (normalized).
+    dtype (np.dtype): The dtype of the copy.
+    
+    Returns:
+    LinearRegression: The fitted copy.
+    """
+    refitted = copy.copy(model)
+    # Own state: the iterative solvers update theta in place
+    refitted.theta = np.zeros(len(model.theta))
+    refitted.dtype = np.dtype(dtype)
+    refitted.telemetry = None
+    refitted.inlier_mask = None
+    refitted._expanded = None
+    refitted.cost_history = CostHistory(capacity=model.n_iterations)
+    with contextlib.redirect_stdout(io.StringIO()):
+        refitted.fit(X, y)
+    return refitted
+
+
+def check_precision(model, X, y, r2_tolerance=1e-4, theta_tolerance=1e-3,
+                    X_reference=None, y_reference=None, refit=False):
+    """
+    Guardrail of reduced-precision fits: refit a float64 copy of the model,
+    from the initial parameters, on float64 data and warn when R² or the
+    parameters drift beyond the tolerances. The model is left unchanged.
+    
+    Arguments:
+    model (LinearRegression): The model fitted on (X, y).
+    X (numpy array): The input feature values (normalized) the model was fitted on.
+    y (numpy array): The target values (normalized).
+    r2_tolerance (float): Maximum absolute difference of R².
+    theta_tolerance (float): Maximum absolute difference of a parameter.
+    X_reference (numpy array): The same features normalized in float64, so that the
+    storage error of X is measured too; defaults to X cast to float64.
+    y_reference (numpy array): The same targets normalized in float64.
+    refit (bool): (X, y) is a sample of the training data (see precision_rows):
+    compare a copy of the model refitted on it in its own dtype instead of the model.
+    
+    Returns:
+    dict: r2, r2_reference, theta_drift and within_tolerance.
+    """
+    if refit:
+        model = refit_copy(model, X, y, model.dtype)
+    X = np.asarray(X if X_reference is None else X_reference, dtype=np.float64)
+    y = np.asarray(y if y_reference is None else y_reference, dtype=np.float64)
+    reference = refit_copy(model, X, y, np.float64)
+    r2 = r2_score(model.theta, X, y, model.basis)
+    r2_reference = r2_score(reference.theta, X, y, model.basis)
+    theta_drift = float(np.max(np.abs(model.theta - reference.theta)))
+    within_tolerance = abs(r2 - r2_reference) <= r2_tolerance and theta_drift <= theta_tolerance
+    if within_tolerance:
+        print(f"✓ Precision check: R² {r2:.6f} vs {r2_reference:.6f} (float64), "
+              f"max parameter drift {theta_drift:.2e}")
+    else:
+        print(f"⚠️  Precision check failed: R² {r2:.6f} vs {r2_reference:.6f} (float64), "
+              f"max parameter drift {theta_drift:.2e} (tolerances {r2_tolerance:g} / {theta_tolerance:g})")
+    return {'r2': r2, 'r2_reference': r2_reference, 'theta_drift': theta_drift,
+            'within_tolerance': within_tolerance}
+
 
 class LinearRegression:
     """
@@ -28,22 +237,138 @@ class LinearRegression:
     learning_rate (float): The step size for updating the parameters during gradient descent.
     tolerance (float): The threshold for convergence. If the change in cost function is less than this value, the algorithm will stop.
     n_iterations (int): The maximum number of iterations for gradient descent.
+    solver (str): The method used by fit: 'gd' (gradient descent), 'normal'
+    (closed-form normal equation), 'lstsq' (numpy least squares) or 'sgd'
+    (mini-batch gradient descent, n_iterations is then the number of epochs),
+    'huber' (Huber loss by iteratively reweighted least squares) or 'ransac'
+    (consensus of candidate lines through random pairs of samples).
+    batch_size (int): Number of samples per update for the 'sgd' solver (1 is pure SGD).
+    lr_schedule (str): Learning-rate schedule over epochs: 'constant', 'step',
+    'exponential' or 'cosine'.
+    decay_rate (float): Decay factor of the 'step' and 'exponential' schedules.
+    decay_steps (int): Number of epochs between two decays of the 'step' schedule.
+    optimizer (str): Update rule of the 'sgd' solver: 'sgd', 'momentum' or 'adam'.
+    momentum (float): Momentum coefficient of the 'momentum' optimizer.
+    random_state (int): Seed of the generator used to shuffle the samples every epoch.
+    history (str): Retention of the cost history: 'full', 'every' (one cost every
+    history_every iterations) or 'ring' (the last history_size costs and a min/max envelope).
+    history_every (int): Sampling period of the 'every' history.
+    history_size (int): Length of the 'ring' history.
+    gd_kernel (str): Implementation of the 'gd' solver: 'gram' (O(1) iterations
+    from precomputed moments) or 'reference' (the plain loop over the data).
+    huber_delta (float): Residuals beyond huber_delta robust standard deviations
+    get a linear instead of quadratic loss ('huber' solver).
+    ransac_trials (int): Number of candidate models drawn by the 'ransac' solver.
+    ransac_threshold (float): Inlier threshold of 'ransac', in robust standard
+    deviations of the target.
+    ransac_sample_rows (int): Number of rows the candidates are scored on (all rows
+    if fewer); the final model is refitted on every inlier.
+    dtype (str or np.dtype): dtype of the design matrices of the 'gd' reference loop,
+    'sgd' and 'lstsq' solvers; the other solvers accumulate in float64 whatever
+    the dtype of the data.
 
     Attributes:
     learning_rate (float): The step size for updating the parameters during gradient descent.
     tolerance (float): The threshold for convergence. If the change in cost function is less than this value, the algorithm will stop.
     n_iterations (int): The maximum number of iterations for gradient descent.
-    theta0 (float): The intercept term of the linear model.
-    theta1 (float): The slope term of the linear model.
-    cost_history (list): A list to store the cost function values at each iteration for analysis.
+    solver (str): The method used by fit to learn the parameters.
+    theta (numpy array): The parameters [intercept, weight of each feature].
+    theta0 (float): The intercept term of the linear model (theta[0]).
+    theta1 (float): The slope of the first feature (theta[1]).
+    cost_history (CostHistory): The cost function values of the iterations, for analysis.
+    stats (SufficientStats): The km / price statistics of the training data, when known.
+    They are saved with the model and allow incremental updates with partial_fit.
+    converged_iteration (int): Iteration (epoch) at which the last iterative fit
+    converged, None if it did not.
+    inlier_mask (numpy array): Rows kept by the last 'ransac' fit.
+    basis (dict): Basis spec (basis.make_basis) the single feature is expanded on
+    by fit and predict, None for a linear model of the features.
+    telemetry (instrumentation.Telemetry): Optional collector whose callbacks are
+    invoked after every iteration; None (the default) costs nothing.
     """
-    def __init__(self, learning_rate=0.01, tolerance=1e-6, n_iterations=1000):
+    def __init__(self, learning_rate=0.01, tolerance=1e-6, n_iterations=1000, solver='gd',
+                 batch_size=32, lr_schedule='constant', decay_rate=0.5, decay_steps=10,
+                 optimizer='sgd', momentum=0.9, random_state=None,
+                 history='full', history_every=10, history_size=1000, gd_kernel='gram',
+                 dtype=np.float64, huber_delta=1.345, ransac_trials=2000, ransac_threshold=2.0,
+                 ransac_sample_rows=20000, basis=None):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+        if lr_schedule not in LR_SCHEDULES:
+            raise ValueError(f"Unknown lr_schedule '{lr_schedule}', expected one of {LR_SCHEDULES}")
+        if optimizer not in OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}', expected one of {OPTIMIZERS}")
+        if gd_kernel not in GD_KERNELS:
+            raise ValueError(f"Unknown gd_kernel '{gd_kernel}', expected one of {GD_KERNELS}")
+        if history not in HISTORY_MODES:
+            raise ValueError(f"Unknown history '{history}', expected one of {HISTORY_MODES}")
         self.learning_rate = learning_rate
         self.tolerance = tolerance # tolerance for convergence
         self.n_iterations = n_iterations
-        self.theta0 = 0.0  # Intercept
-        self.theta1 = 0.0  # Slope
-        self.cost_history = []  # To store cost function values during training
+        self.solver = solver
+        self.gd_kernel = gd_kernel
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self.lr_schedule = lr_schedule
+        self.decay_rate = decay_rate
+        self.decay_steps = decay_steps
+        self.optimizer = optimizer
+        self.momentum = momentum
+        self.random_state = random_state
+        self.huber_delta = huber_delta
+        self.ransac_trials = ransac_trials
+        self.ransac_threshold = ransac_threshold
+        self.ransac_sample_rows = ransac_sample_rows
+        self.inlier_mask = None
+        self.basis = basis
+        # (training array, its expanded columns), see expanded
+        self._expanded = None
+        self.theta = np.zeros(2)  # [Intercept, Slope]
+        # To store cost function values during training
+        self.cost_history = CostHistory(history, every=history_every, size=history_size,
+                                        capacity=n_iterations)
+        self.stats = None
+        self.converged_iteration = None
+        self.telemetry = None
+
+    @property
+    def theta0(self):
+        """The intercept term of the linear model."""
+        return float(self.theta[0])
+
+    @theta0.setter
+    def theta0(self, value):
+        self.theta[0] = value
+
+    @property
+    def theta1(self):
+        """The slope of the first feature."""
+        return float(self.theta[1])
+
+    @theta1.setter
+    def theta1(self, value):
+        self.theta[1] = value
+
+    def init_theta(self, n_features):
+        """
+        Reset theta to zeros if it does not match the number of features.
+        
+        Arguments:
+        n_features (int): The number of feature columns of the training data.
+        """
+        if len(self.theta) != n_features + 1:
+            self.theta = np.zeros(n_features + 1)
+
+    def format_theta(self):
+        """
+        Format the learned parameters for the training logs.
+        
+        Returns:
+        str: "theta0 = ..., theta1 = ..., ..."
+        """
+        parts = [f"theta0 = {self.theta[0]:.4e}"]
+        parts += [f"theta{i} = {t:.4f}" for i, t in enumerate(self.theta[1:], start=1)]
+        return ", ".join(parts)
     def compute_cost(self, errors, m):
         """
         Compute the cost function for linear regression.
@@ -56,76 +381,497 @@ class LinearRegression:
         float: The computed cost value.
         """
         # Compute the cost using the mean squared error formula
-        return (1/(m)) * np.sum(errors ** 2)
+        return (1/(m)) * np.sum(errors ** 2, dtype=np.float64)
         
     
         
     
     def gradient_descent(self, X, y, plot_interval=10, plot_fit=False, data=None, norm_stat=None):
         """
-        Perform gradient descent to learn the parameters theta0 and theta1.
+        Perform gradient descent to learn the parameter vector theta.
         
         Arguments:
-        X (numpy array): The input feature values (normalized).
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
         y (numpy array): The target values (normalized).
         """
         m = len(y)
+        design = design_matrix(X, self.dtype)
+        self.init_theta(design.shape[1] - 1)
+        self.converged_iteration = None
         for iteration in range(self.n_iterations):
             # Calculate the predicted values based on current parameters
-            predictions = self.theta0 + self.theta1 * X
+            predictions = design @ self.theta
             # Calculate the errors between predictions and actual target values
             errors = predictions - y
             
-            # Compute the gradients for theta0 and theta1
-            d_theta0 = (1/m) * np.sum(errors)
-            d_theta1 = (1/m) * np.sum(errors * X)
+            # Compute the gradients of every parameter in one matrix-vector product
+            gradient = (1/m) * (design.T @ errors)
             
             # Update the parameters using the computed gradients and learning rate
-            self.theta0 -= self.learning_rate * d_theta0
-            self.theta1 -= self.learning_rate * d_theta1
+            self.theta -= self.learning_rate * gradient
             
             # Compute the cost function value after updating parameters
             cost = self.compute_cost(errors, m)
             self.cost_history.append(cost) # Store cost for analysis
+            if self.telemetry is not None:
+                self.telemetry.iteration(iteration, cost, self.theta)
             
             if iteration % plot_interval == 0 or iteration == self.n_iterations - 1:
-                print(f"Iteration {iteration}: Cost = {cost:.6f}, theta0 = {self.theta0:.4e}, theta1 = {self.theta1:.4f}")
+                print(f"Iteration {iteration}: Cost = {cost:.6f}, {self.format_theta()}")
                 # Optionally, plot the fit at certain iterations to visualize convergence
                 if data is not None and norm_stat is not None and plot_fit:
+                    # Imported here so that headless fits do not load matplotlib
+                    from visualization import plot_regression
                     plt = plot_regression(data, self, norm_stat, title=f"Iteration {iteration} Fit")
                     plt.show(block=False)  # Non-blocking show to allow the loop to continue
                     plt.pause(3)           # Pause to display the plot for a short time
                     plt.close()            # Close the plot to avoid too many open windows during training
             
             # Check for convergence by comparing the change in cost function value
-            if iteration > 0 and abs(self.cost_history[-2] - cost) < self.tolerance:
+            if iteration > 0 and abs(self.cost_history.previous - cost) < self.tolerance:
                 print(f"✓ Convergence reached at iteration {iteration}.")
+                self.converged_iteration = iteration
                 break
 
-    def fit(self, X, y, data=None, norm_stat=None):
+    def gram_gradient_descent(self, X, y, log_interval=10, moments=None):
         """
-        Fit the linear regression model to the training data.
+        Perform the same iterations as gradient_descent, each in time independent
+        of the number of samples. With G = DᵀD / m, b = Dᵀy / m and c = yᵀy / m
+        (see gram_moments), the gradient is G·theta - b and the cost is
+        thetaᵀG·theta - 2·b·theta + c, so the data is only read once, to
+        compute the moments, and no n-length temporary is allocated per iteration.
+        gradient_descent is kept as the reference implementation.
         
         Arguments:
-        X (numpy array): The input feature values (normalized).
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
         y (numpy array): The target values (normalized).
+        log_interval (int): Print the progress every log_interval iterations.
+        moments (tuple): Precomputed gram_moments(X, y), e.g. shared by several fits.
+        """
+        gram, moment, sq = moments if moments is not None else gram_moments(X, y)
+        self.init_theta(len(moment) - 1)
+        self.converged_iteration = None
+        for iteration in range(self.n_iterations):
+            gram_theta = gram @ self.theta
+            # Cost of the parameters before the update, as in gradient_descent
+            cost = float(self.theta @ gram_theta - 2 * (moment @ self.theta) + sq)
+            self.theta -= self.learning_rate * (gram_theta - moment)
+            self.cost_history.append(cost)
+            if self.telemetry is not None:
+                self.telemetry.iteration(iteration, cost, self.theta)
+
+            if iteration % log_interval == 0 or iteration == self.n_iterations - 1:
+                print(f"Iteration {iteration}: Cost = {cost:.6f}, {self.format_theta()}")
+
+            if iteration > 0 and abs(self.cost_history.previous - cost) < self.tolerance:
+                print(f"✓ Convergence reached at iteration {iteration}.")
+                self.converged_iteration = iteration
+                break
+
+    def scheduled_learning_rate(self, epoch):
+        """
+        Learning rate to use at the given epoch according to lr_schedule.
+        
+        Arguments:
+        epoch (int): The current epoch, starting at 0.
+        
+        Returns:
+        float: The learning rate for this epoch.
         """
-        plot_fit = input("Do you want to visualize the fit during training? (y/n): ").strip().lower() == 'y'
-        print("✓Starting gradient descent...")
-        self.gradient_descent(X, y, plot_fit=plot_fit, data=data, norm_stat=norm_stat)
-        print(f"First cost: {self.cost_history[0]:.6f}  ")
-        print(f"Final cost: {self.cost_history[-1]:.6f}")
-        print(f"✓Learned parameters: theta0 = {self.theta0:.4e}, theta1 = {self.theta1:.4f}")  
+        if self.lr_schedule == 'step':
+            return self.learning_rate * self.decay_rate ** (epoch // self.decay_steps)
+        if self.lr_schedule == 'exponential':
+            return self.learning_rate * np.exp(-self.decay_rate * epoch)
+        if self.lr_schedule == 'cosine':
+            return 0.5 * self.learning_rate * (1 + np.cos(np.pi * epoch / self.n_iterations))
+        return self.learning_rate
+
+    def sgd_step(self, design, y, learning_rate):
+        """
+        Apply one update of the configured optimizer on a mini-batch.
+        
+        Arguments:
+        design (numpy array): The design matrix [1, X] of the batch (normalized).
+        y (numpy array): The target values of the batch (normalized).
+        learning_rate (float): The step size for this update.
+        
+        Returns:
+        float: The batch cost before the update.
+        """
+        m = len(y)
+        errors = design @ self.theta - y
+        grad = (design.T @ errors) / m
+        if self.optimizer == 'momentum':
+            self._velocity = self.momentum * self._velocity + grad
+            step = learning_rate * self._velocity
+        elif self.optimizer == 'adam':
+            self._adam_t += 1
+            self._adam_m = ADAM_BETA1 * self._adam_m + (1 - ADAM_BETA1) * grad
+            self._adam_v = ADAM_BETA2 * self._adam_v + (1 - ADAM_BETA2) * grad ** 2
+            m_hat = self._adam_m / (1 - ADAM_BETA1 ** self._adam_t)
+            v_hat = self._adam_v / (1 - ADAM_BETA2 ** self._adam_t)
+            step = learning_rate * m_hat / (np.sqrt(v_hat) + ADAM_EPSILON)
+        else:
+            step = learning_rate * grad
+        self.theta -= step
+        return self.compute_cost(errors, m)
+
+    def minibatch_gradient_descent(self, chunks, log_interval=10):
+        """
+        Perform mini-batch gradient descent for n_iterations epochs.
+        
+        Every epoch the samples of each chunk are shuffled with a seeded
+        generator and split into batches of batch_size samples. The cost of
+        an epoch is the sample-weighted mean of its batch costs, so no extra
+        pass over the data is needed to monitor convergence.
+        
+        Arguments:
+        chunks (callable): Returns a fresh iterable of (X, y) normalized arrays
+        for each epoch, e.g. lambda: [(X, y)] or chunked reads from data_loader.
+        log_interval (int): Print the progress every log_interval epochs.
+        """
+        rng = np.random.default_rng(self.random_state)
+        self._velocity = None
+        self.converged_iteration = None
+        for epoch in range(self.n_iterations):
+            learning_rate = self.scheduled_learning_rate(epoch)
+            total_cost = 0.0
+            n_samples = 0
+            for X, y in chunks():
+                design = design_matrix(X, self.dtype)
+                if self._velocity is None:
+                    self.init_theta(design.shape[1] - 1)
+                    self._velocity = np.zeros_like(self.theta)
+                    self._adam_m = np.zeros_like(self.theta)
+                    self._adam_v = np.zeros_like(self.theta)
+                    self._adam_t = 0
+                perm = rng.permutation(len(y))
+                design, y = design[perm], y[perm]
+                for start in range(0, len(y), self.batch_size):
+                    design_batch = design[start:start + self.batch_size]
+                    y_batch = y[start:start + self.batch_size]
+                    total_cost += self.sgd_step(design_batch, y_batch, learning_rate) * len(y_batch)
+                    n_samples += len(y_batch)
+            cost = total_cost / n_samples
+            self.cost_history.append(cost)
+            if self.telemetry is not None:
+                self.telemetry.iteration(epoch, cost, self.theta)
+
+            if epoch % log_interval == 0 or epoch == self.n_iterations - 1:
+                print(f"Epoch {epoch}: Cost = {cost:.6f}, lr = {learning_rate:.4e}, {self.format_theta()}")
+
+            if epoch > 0 and abs(self.cost_history.previous - cost) < self.tolerance:
+                print(f"✓ Convergence reached at epoch {epoch}.")
+                self.converged_iteration = epoch
+                break
+
+    def normal_equation(self, X, y):
+        """
+        Compute theta with the closed-form solution of the least squares
+        problem on centered features: w = Sxx⁻¹ Sxy (w = cov(X, y) / var(X)
+        for a single feature) and theta0 = mean(y) - mean(X) · w.
+        
+        Arguments:
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
+        y (numpy array): The target values (normalized).
+        """
+        m = len(y)
+        x_mean = np.mean(np.asarray(X).reshape(m, -1), axis=0, dtype=np.float64)
+        y_mean = float(np.mean(y, dtype=np.float64))
+        # Centered sums accumulated in float64 over blocks of rows
+        s_xx, s_xy, s_yy = 0.0, 0.0, 0.0
+        for design, y_block in iter_blocks(X, y):
+            x_centered = design[:, 1:] - x_mean
+            y_centered = y_block - y_mean
+            s_xx = s_xx + x_centered.T @ x_centered
+            s_xy = s_xy + x_centered.T @ y_centered
+            s_yy += float(y_centered @ y_centered)
+        # lstsq on the small Gram matrix gives a zero weight to constant features
+        weights = np.linalg.lstsq(s_xx, s_xy, rcond=None)[0]
+        self.theta = np.concatenate(([y_mean - x_mean @ weights], weights))
+        # Residual sum of squares of the centered fit
+        self.cost_history.append((s_yy - 2 * weights @ s_xy + weights @ s_xx @ weights) / m)
+
+    def solve_moments(self, moments):
+        """
+        Solve the normal equation from gram_moments, centering them on the
+        means they contain (first row of the Gram matrix and of Dᵀy / m),
+        so that the data is only read once to accumulate them.
+        
+        Arguments:
+        moments (tuple): (gram, moment, sq) returned by gram_moments.
+        """
+        gram, moment, sq = moments
+        x_mean, y_mean = gram[0, 1:], moment[0]
+        s_xx = gram[1:, 1:] - np.outer(x_mean, x_mean)
+        s_xy = moment[1:] - x_mean * y_mean
+        weights = np.linalg.lstsq(s_xx, s_xy, rcond=None)[0]
+        self.theta = np.concatenate(([y_mean - x_mean @ weights], weights))
+        self.cost_history.append(sq - y_mean ** 2 - 2 * weights @ s_xy + weights @ s_xx @ weights)
+
+    def expanded(self, X):
+        """
+        Expanded basis columns of the training array X, computed once and
+        reused by the following fits on the same array (e.g. check_precision).
+        """
+        if self._expanded is None or self._expanded[0] is not X \
+                or self._expanded[1].dtype != self.dtype:
+            self._expanded = (X, expand(X, self.basis).astype(self.dtype, copy=False))
+        return self._expanded[1]
+
+    def least_squares(self, X, y):
+        """
+        Compute theta by solving the least squares problem on the
+        design matrix [1, X] with numpy (SVD based, robust to ill-conditioning).
+        
+        Arguments:
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
+        y (numpy array): The target values (normalized).
+        """
+        design = design_matrix(X, self.dtype)
+        self.theta, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+        self.cost_history.append(self.compute_cost(design @ self.theta - y, len(y)))
+
+    def huber_irls(self, X, y):
+        """
+        Minimize the Huber loss by iteratively reweighted least squares.
+        Starting from the least squares fit, each iteration rescales the
+        residuals by their robust standard deviation, gives the rows beyond
+        huber_delta a weight huber_delta / |r| (1 otherwise) and solves the
+        weighted normal equations (DᵀWD) theta = DᵀWy, until theta moves less
+        than tolerance.
+        
+        Arguments:
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
+        y (numpy array): The target values (normalized).
+        """
+        design = design_matrix(X)
+        y = np.asarray(y, dtype=np.float64)
+        self.theta = np.linalg.lstsq(design, y, rcond=None)[0]
+        self.converged_iteration = None
+        for iteration in range(self.n_iterations):
+            residuals = y - design @ self.theta
+            scale = robust_scale(residuals)
+            scaled = np.abs(residuals) / scale
+            weights = np.minimum(1.0, self.huber_delta / np.maximum(scaled, 1e-12))
+            # Huber loss of the current parameters, in units of the robust scale
+            loss = np.where(scaled <= self.huber_delta, 0.5 * scaled ** 2,
+                            self.huber_delta * (scaled - 0.5 * self.huber_delta))
+            self.cost_history.append(float(np.mean(loss)))
+            if self.telemetry is not None:
+                self.telemetry.iteration(iteration, self.cost_history.last, self.theta)
+            weighted = design * weights[:, np.newaxis]
+            theta = np.linalg.lstsq(weighted.T @ design, weighted.T @ y, rcond=None)[0]
+            step = np.max(np.abs(theta - self.theta))
+            self.theta = theta
+            if step < self.tolerance:
+                print(f"✓ Convergence reached at iteration {iteration} "
+                      f"({np.count_nonzero(weights < 1)} down-weighted rows).")
+                self.converged_iteration = iteration
+                break
+
+    def ransac(self, X, y):
+        """
+        Fit the model by RANSAC: ransac_trials candidate models are solved
+        exactly through random minimal samples (n_features + 1 rows) in one
+        batched solve, then scored together on up to ransac_sample_rows rows
+        as one (candidates x rows) residual matrix. The candidate with the
+        most inliers (|residual| below ransac_threshold robust standard
+        deviations of y; ties broken by the inlier squared error) defines the
+        inliers, on which the model is refitted by least squares.
+        
+        Arguments:
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
+        y (numpy array): The target values (normalized).
+        """
+        design = design_matrix(X)
+        y = np.asarray(y, dtype=np.float64)
+        m, n_params = design.shape
+        rng = np.random.default_rng(self.random_state)
+        threshold = self.ransac_threshold * robust_scale(y)
+
+        # Batched exact solves of the minimal samples, degenerate ones discarded
+        samples = rng.integers(0, m, size=(self.ransac_trials, n_params))
+        systems = design[samples]
+        degenerate = np.abs(np.linalg.det(systems)) < 1e-12
+        systems[degenerate] = np.eye(n_params)
+        candidates = np.linalg.solve(systems, y[samples][..., np.newaxis])[..., 0]
+        candidates = candidates[~degenerate]
+        if len(candidates) == 0:
+            raise ValueError("RANSAC drew only degenerate samples")
+
+        rows = rng.choice(m, self.ransac_sample_rows, replace=False) if m > self.ransac_sample_rows \
+            else np.arange(m)
+        design_rows, y_rows = design[rows], y[rows]
+        n_inliers = np.empty(len(candidates), dtype=np.int64)
+        inlier_error = np.empty(len(candidates))
+        batch = max(1, RANSAC_BATCH_CELLS // len(rows))
+        for start in range(0, len(candidates), batch):
+            residuals = y_rows - candidates[start:start + batch] @ design_rows.T
+            inliers = np.abs(residuals) < threshold
+            n_inliers[start:start + batch] = inliers.sum(axis=1)
+            inlier_error[start:start + batch] = np.where(inliers, residuals ** 2, 0.0).sum(axis=1)
+        best = np.lexsort((inlier_error, -n_inliers))[0]
+
+        self.inlier_mask = np.abs(y - design @ candidates[best]) < threshold
+        self.theta = np.linalg.lstsq(design[self.inlier_mask], y[self.inlier_mask], rcond=None)[0]
+        errors = design[self.inlier_mask] @ self.theta - y[self.inlier_mask]
+        self.cost_history.append(self.compute_cost(errors, len(errors)))
+        print(f"✓ RANSAC: {len(candidates)} candidates scored, "
+              f"{np.count_nonzero(self.inlier_mask)}/{m} inliers kept.")
+
+    def fit_from_stats(self, stats):
+        """
+        Fit the model in normalized space from streamed sufficient statistics
+        (see data_loader.SufficientStats), without the data itself.
+        
+        Once km and price are z-score normalized the least squares intercept is 0
+        and the slope is the Pearson correlation between km and price.
+        
+        Arguments:
+        stats (SufficientStats): The accumulated statistics of the training data.
+        """
+        self.stats = stats
+        denom = np.sqrt(stats.km_m2 * stats.price_m2)
+        r = stats.cross_m2 / denom if denom != 0 else 0.0
+        self.theta = np.array([0.0, r])
+        # MSE of the normalized fit: (n - 1) / n * (1 - r²)
+        self.cost_history.append((stats.n - 1) / stats.n * (1 - r * r))
+        print(f"Final cost: {self.cost_history.last:.6f}")
+        print(f"✓Learned parameters: {self.format_theta()}")
+
+    def partial_fit(self, km, price, forgetting_factor=1.0):
+        """
+        Update a km -> price model with new rows in time proportional to the
+        new rows only: their statistics are merged into the accumulated ones
+        and the parameters are refitted from the merged statistics.
+        Unlike the other solvers, the rows are given in raw units since the
+        normalization statistics themselves are updated.
+        
+        Arguments:
+        km (numpy array): Raw mileage values of the new rows.
+        price (numpy array): Raw prices of the new rows.
+        forgetting_factor (float): Weight kept by the previous observations,
+        in (0, 1]; 1 keeps the whole history, lower values track drift.
+        
+        Returns:
+        dict: The updated normalization statistics, in the format of normalize_data.
+        """
+        # Imported here so that the model does not load pandas with data_loader
+        from data_loader import SufficientStats
+
+        if self.stats is None:
+            self.stats = SufficientStats()
+        batch = SufficientStats()
+        batch.update(km, price)
+        self.stats.decay(forgetting_factor)
+        self.stats.merge(batch)
+        self.fit_from_stats(self.stats)
+        return self.stats.to_norm_stats()
+
+    def fit(self, X, y, data=None, norm_stat=None, plot_fit=None):
+        """
+        Fit the linear regression model to the training data
+        using the configured solver.
+        
+        Arguments:
+        X (numpy array): The input feature values (normalized), (m,) or (m, n_features).
+        y (numpy array): The target values (normalized).
+        data (pd.DataFrame): The raw data, used to plot the fit during gradient descent.
+        norm_stat (dict): The normalization statistics, used to plot the fit.
+        plot_fit (bool): Plot the fit during gradient descent; None asks the user
+        when data and norm_stat are given.
+        """
+        moments = None
+        if self.basis is not None:
+            if len(y) * basis_size(self.basis) > BASIS_CACHE_CELLS \
+                    and (self.solver == 'normal' or self.solver == 'gd' and self.gd_kernel == 'gram'):
+                # Too large to cache: the expanded rows are generated block by block
+                print(f"✓Accumulating the {self.basis['type']} basis moments over blocks of rows...")
+                moments = gram_moments(X, y, basis=self.basis)
+            else:
+                X = self.expanded(X)
+        if self.solver == 'normal':
+            print("✓Solving the normal equation...")
+            if moments is not None:
+                self.solve_moments(moments)
+            else:
+                self.normal_equation(X, y)
+        elif self.solver == 'lstsq':
+            print("✓Solving the least squares problem...")
+            self.least_squares(X, y)
+        elif self.solver == 'huber':
+            print(f"✓Fitting the Huber loss (delta = {self.huber_delta})...")
+            self.huber_irls(X, y)
+        elif self.solver == 'ransac':
+            print(f"✓Running RANSAC ({self.ransac_trials} candidates)...")
+            self.ransac(X, y)
+        elif self.solver == 'sgd':
+            print(f"✓Starting mini-batch gradient descent (batch size {self.batch_size}, {self.optimizer})...")
+            self.minibatch_gradient_descent(lambda: [(X, y)])
+        else:
+            # The fit can only be drawn when the raw data and its statistics are given
+            if data is None or norm_stat is None or moments is not None:
+                plot_fit = False
+            elif plot_fit is None:
+                plot_fit = input("Do you want to visualize the fit during training? (y/n): ").strip().lower() == 'y'
+            print("✓Starting gradient descent...")
+            if plot_fit or self.gd_kernel == 'reference':
+                # The live plot needs the loop over the data
+                self.gradient_descent(X, y, plot_fit=plot_fit, data=data, norm_stat=norm_stat)
+            else:
+                self.gram_gradient_descent(X, y, moments=moments)
+        print(f"First cost: {self.cost_history.first:.6f}  ")
+        print(f"Final cost: {self.cost_history.last:.6f}")
+        print(f"✓Learned parameters: {self.format_theta()}")
         
     def predict(self, X):
         """
         Make predictions using the learned linear regression model.
         
         Arguments:
-        X (numpy array): The input feature values (normalized) for which to make predictions.
+        X (numpy array): The input feature values (normalized) for which to make predictions,
+        (m,) for a single feature or (m, n_features).
         
         Returns:
         numpy array: The predicted target values based on the input features.
         """
-        return self.theta0 + self.theta1 * X
+        if self.basis is not None:
+            return self.theta[0] + expand(X, self.basis) @ self.theta[1:]
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim < 2:
+            return self.theta[0] + self.theta[1] * X
+        return self.theta[0] + X @ self.theta[1:]
+    
+
+
+
+def fit_groups(stats, feature='km', target='price'):
+    """
+    Fit one independent regression of target on feature per group at once from
+    the segmented statistics of data_loader.group_statistics.
+    
+    Like fit_from_stats, each group is fitted in its own normalized space where
+    the intercept is 0 and the slope is the Pearson correlation. Groups with
+    less than 2 rows or a constant column get a zero slope and a unit std.
     
+    Arguments:
+    stats (pd.DataFrame): The per-group statistics returned by group_statistics.
+    feature (str): The feature column the statistics were computed on.
+    target (str): The target column the statistics were computed on.
+    
+    Returns:
+    pd.DataFrame: One row per group with n, theta0, theta1 and the normalization
+    statistics, ready for model_saver.save_group_models.
+    """
+    denom = np.sqrt(stats['feature_m2'].to_numpy() * stats['target_m2'].to_numpy())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(denom > 0, stats['cross_m2'].to_numpy() / denom, 0.0)
+    table = stats[['n']].copy()
+    table['theta0'] = 0.0
+    table['theta1'] = r
+    for column in (feature, target):
+        std = stats[f'{column}_std'].to_numpy()
+        table[f'{column}_mean'] = stats[f'{column}_mean']
+        table[f'{column}_std'] = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+    return table
@@ -6,7 +6,7 @@
 #    By: tissad <issad@student.42.fr>                +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/05 16:27:33 by tissad            #+#    #+#              #
-#    Updated: 2026/02/05 23:59:19 by tissad            ###   ########.fr        #
+#    Updated: 2026/10/18 15:05:18 by tissad            ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
@@ -14,90 +14,543 @@
 Docstring pour main
 """
 
-from data_loader import load_data, normalize_data, get_statistics
+from data_loader import load_data, normalize_data, get_statistics, stream_statistics,\
+    iter_normalized_chunks, one_hot_encode, group_statistics, SufficientStats
 from visualization import plot_data, save_plot,display_statistics,\
     plot_regression, plot_cost_history
-from linear_regression import LinearRegression
-from model_saver import save_model
+from linear_regression import LinearRegression, SOLVERS, LR_SCHEDULES, OPTIMIZERS, GD_KERNELS,\
+    DTYPES, ROBUST_SOLVERS, fit_groups, check_precision, precision_rows, r2_score
+from model_saver import save_model, save_group_models, load_model, get_theta, model_params
+from model_registry import ModelRegistry, dataset_fingerprint, DEFAULT_REGISTRY
+from cost_history import HISTORY_MODES
+from basis import BASIS_TYPES, make_basis, basis_names
+from instrumentation import Telemetry, timed, run_profiled, PROFILERS, EXPORT_FORMATS
+from deferred_plots import PlotWorker, FitSnapshots, render_data, render_regression,\
+    render_fit_snapshots, render_cost_history
 
-import pandas as pd
+import numpy as np
 import argparse
+import json
+import sys
+import time
 
-def main(args):
+
+def output_path(args, path, question, prompt, default, directory):
+    """
+    Resolve where an output is saved: the path given on the command line if any,
+    nothing in non-interactive mode, otherwise ask the user.
+    
+    Returns:
+        str: The path of the file to write, or None to skip this output.
+    """
+    if path:
+        return path
+    if args.non_interactive:
+        return None
+    if input(f"\n{question} (y/n): ").strip().lower() != 'y':
+        return None
+    filename = input(f"{prompt} (e.g., '{default}'): ").strip()
+    filename = default if not filename else filename
+    return f'{directory}/{filename}'
+
+
+def ask_save_model(args, model, norm_stat):
+    """Save the model parameters to --save_model, or ask whether to save them under ./models."""
+    model_file = output_path(args, args.save_model,
+                             "Do you want to save the model parameters?",
+                             "Enter the filename to save the model parameters",
+                             'model_params.json', './models')
+    if model_file:
+        save_model(model, norm_stat, filename=model_file)
+
+
+# Options recorded with the registered versions
+HYPERPARAMETERS = ('solver', 'learning_rate', 'tolerance', 'max_iter', 'gd_kernel', 'batch_size',
+                   'lr_schedule', 'optimizer', 'seed', 'dtype', 'basis', 'degree', 'n_knots',
+                   'huber_delta', 'ransac_trials', 'ransac_threshold')
+
+
+def register_model(args, model, norm_stat, data_file, rows, r2, training_seconds):
+    """Publish the fitted model as a new version of --register, with its training metadata."""
+    metadata = {
+        'dataset': dataset_fingerprint(data_file),
+        'rows': int(rows),
+        'r2': r2,
+        'training_seconds': round(training_seconds, 6),
+        'hyperparameters': {option: getattr(args, option) for option in HYPERPARAMETERS}
+    }
+    version = ModelRegistry(args.registry).register(args.register, model_params(model, norm_stat), metadata)
+    print(f"✓ Model registered: {args.register}@{version} (registry '{args.registry}')")
+
+
+def build_model(args, basis=None):
+    """
+    Create the LinearRegression model configured from the command line arguments,
+    fitted on the basis spec when given.
+    """
+    return LinearRegression(learning_rate=args.learning_rate, tolerance=args.tolerance,
+                            n_iterations=args.max_iter,
+                            solver=args.solver, batch_size=args.batch_size,
+                            lr_schedule=args.lr_schedule, optimizer=args.optimizer,
+                            random_state=args.seed, history=args.history,
+                            history_every=args.history_every, history_size=args.history_size,
+                            gd_kernel=args.gd_kernel, dtype=args.dtype, huber_delta=args.huber_delta,
+                            ransac_trials=args.ransac_trials, ransac_threshold=args.ransac_threshold,
+                            basis=basis)
+
+
+def train_streaming(args, telemetry=None):
+    """
+    Train the model from chunked reads of the dataset: only the running
+    sufficient statistics are kept in memory, never the full DataFrame.
+    """
+    if args.features != 'km' or args.target != 'price' or args.categorical:
+        print("✗ Streaming mode only supports the km -> price model. Exiting.")
+        return 1
+    data_file = args.data_file if args.data_file else './data/data.csv'
+    print(f"✓Streaming data in chunks of {args.chunksize} rows...")
+    with timed(telemetry, 'load'):
+        stats = stream_statistics(data_file, chunksize=args.chunksize)
+    if stats is None or stats.n < 2:
+        print("✗ Failed to load data. Exiting.")
+        return 1
+    print("✓Data streamed successfully.")
+
+    norm_stat = stats.to_norm_stats()
+    model = build_model(args)
+    model.telemetry = telemetry
+    start = time.perf_counter()
+    with timed(telemetry, 'fit'):
+        if args.solver == 'sgd':
+            # Mini-batches are drawn from each chunk while the file is re-read every epoch
+            print("\n✓Fitting linear regression model by mini-batch gradient descent on chunks...")
+            print("-" * 60)
+            model.minibatch_gradient_descent(
+                lambda: iter_normalized_chunks(data_file, norm_stat, chunksize=args.chunksize))
+            model.stats = stats
+        else:
+            print("\n✓Fitting linear regression model from sufficient statistics...")
+            print("-" * 60)
+            model.fit_from_stats(stats)
+    training_seconds = time.perf_counter() - start
+    print("✓Model fitted successfully.")
+    if telemetry is not None:
+        telemetry.record_fit(model)
+
+    with timed(telemetry, 'save'):
+        ask_save_model(args, model, norm_stat)
+        if args.register:
+            # The R² of the exact fit is the squared correlation theta1²
+            r2 = None if args.solver == 'sgd' else model.theta1 ** 2
+            register_model(args, model, norm_stat, data_file, stats.n, r2, training_seconds)
+    return 0
+
+
+def update_model(args):
+    """
+    Update a saved km -> price model with the rows of --data_file only:
+    their statistics are merged into the ones stored in the model.
+    """
+    params = load_model(args.update_model)
+    if params is None:
+        return 1
+    if 'sufficient_stats' not in params:
+        print("✗ The model has no sufficient statistics (robust and basis models cannot be updated): "
+              "retrain it on the full data. Exiting.")
+        return 1
+    data_file = args.data_file if args.data_file else './data/data.csv'
+    print("✓Loading new data...")
+    data = load_data(data_file, use_cache=args.cache)
+    if data is None:
+        print("✗ Failed to load data. Exiting.")
+        return 1
+
+    print(f"\n✓Updating the model with {len(data)} new rows "
+          f"(forgetting factor {args.forgetting_factor})...")
+    print("-" * 60)
+    model = build_model(args)
+    model.theta = np.array(get_theta(params))
+    model.stats = SufficientStats.from_dict(params['sufficient_stats'])
+    norm_stat = model.partial_fit(data['km'].to_numpy(dtype=np.float64),
+                                  data['price'].to_numpy(dtype=np.float64),
+                                  forgetting_factor=args.forgetting_factor)
+    print("✓Model updated successfully.")
+    save_model(model, norm_stat, filename=args.save_model if args.save_model else args.update_model)
+    return 0
+
+
+def train_groups(args):
+    """
+    Fit one km -> price model per value of the --group_by column, all groups
+    at once from segmented sums, and save them as one table.
+    """
+    features = args.features.split(',')
+    if len(features) != 1 or args.categorical:
+        print("✗ Grouped training supports a single numeric feature. Exiting.")
+        return 1
+    data_file = args.data_file if args.data_file else './data/data.csv'
+    print("✓Loading data...")
+    data = load_data(data_file, use_cache=args.cache)
+    if data is None or args.group_by not in data.columns:
+        print("✗ Failed to load data or missing group column. Exiting.")
+        return 1
+
+    print(f"\n✓Fitting one model per '{args.group_by}'...")
+    print("-" * 60)
+    stats = group_statistics(data, args.group_by, feature=features[0], target=args.target)
+    table = fit_groups(stats, feature=features[0], target=args.target)
+    print(f"✓{len(table)} models fitted successfully.")
+    print(table.head(10).to_string())
+
+    model_file = output_path(args, args.save_model,
+                             "Do you want to save the group models?",
+                             "Enter the filename to save the group models",
+                             'group_models.json', './models')
+    if model_file:
+        save_group_models(table, model_file, feature=features[0], target=args.target)
+    return 0
+
+
+def train(args, telemetry=None):
+    """Train the model on the whole dataset, timing its phases into telemetry if given."""
+    if args.basis and (args.update_model or args.stream or args.group_by
+                       or ',' in args.features or args.categorical):
+        print("✗ --basis expands a single numeric feature of an in-memory training, "
+              "without --categorical, --update_model, --stream or --group_by.")
+        return 1
+    if args.update_model:
+        return update_model(args)
+    if args.stream:
+        return train_streaming(args, telemetry)
+    if args.group_by:
+        return train_groups(args)
     # Load the data
     data_file = args.data_file if args.data_file else './data/data.csv'
     print("✓Loading data...")
-    data = load_data(data_file)
+    # float64 keeps the columns as parsed
+    dtype = None if args.dtype == 'float64' else args.dtype
+    features = args.features.split(',')
+    categorical = args.categorical.split(',') if args.categorical else []
+    with timed(telemetry, 'load'):
+        data = load_data(data_file, use_cache=args.cache, dtype=dtype, ingest=args.ingest,
+                         schema={column: np.float64 for column in features + [args.target]},
+                         quarantine_file=args.quarantine_file, workers=args.workers)
     if data is None:
         print("✗ Failed to load data. Exiting.")
         return 1
     print("✓Data loaded successfully.")
+    # The plots are drawn in the km vs price plane only
+    plot_enabled = features == ['km'] and args.target == 'price' and not categorical \
+        and not args.no_plots
+    # Deferred figures are rendered by a background thread while training goes on
+    worker = PlotWorker() if args.deferred_plots and not args.no_plots else None
+    try:
+        return fit_and_report(args, data, features, categorical, dtype, plot_enabled, worker, telemetry)
+    finally:
+        if worker is not None:
+            worker.close()
+
+
+def fit_and_report(args, data, features, categorical, dtype, plot_enabled, worker, telemetry=None):
+    """
+    Analyse, normalize and fit the loaded data, then draw the plots (through
+    worker when deferred) and save the model.
+    """
 
 
     # statistics analysis
     print("\n✓Performing statistical analysis...")
     print("-" * 60)
-    stats_desc = get_statistics(data)
+    stats_desc = get_statistics(data, columns=features + [args.target])
     display_statistics(stats_desc)
 
 
     # Data visualization
-    print("\nData Visualization")
-    print("-" * 60)
-    plt1 = plot_data(data)
-    save_plot(plt1, './plot/original_data_plot.png')
-    plt1.close()
+    if plot_enabled:
+        print("\nData Visualization")
+        print("-" * 60)
+        if worker is not None:
+            worker.submit(render_data, './plot/original_data_plot.png',
+                          data['km'].to_numpy(), data['price'].to_numpy())
+        else:
+            plt1 = plot_data(data)
+            save_plot(plt1, './plot/original_data_plot.png')
+            plt1.close()
+
 
+    # Encode the categorical columns as 0/1 features
+    if categorical:
+        data, dummy_columns = one_hot_encode(data, categorical)
+        features += dummy_columns
+        print(f"✓Encoded categorical columns: {', '.join(dummy_columns)}")
 
     # Normalize the data
     print("\n✓Normalizing data...")
-    normalized_data, norm_stat = normalize_data(data)
+    with timed(telemetry, 'normalize'):
+        normalized_data, norm_stat = normalize_data(data, features=features, target=args.target,
+                                                    dtype=dtype)
+    norm_stat['categorical'] = categorical
     print("✓Data normalized successfully.")
-    plt2 = plot_data(normalized_data)
-    save_plot(plt2, './plot/normalized_data_plot.png')
-    plt2.close()
+    if plot_enabled and worker is not None:
+        worker.submit(render_data, './plot/normalized_data_plot.png',
+                      normalized_data['km'].to_numpy(), normalized_data['price'].to_numpy())
+    elif plot_enabled:
+        plt2 = plot_data(normalized_data)
+        save_plot(plt2, './plot/normalized_data_plot.png')
+        plt2.close()
 
 
 
     # Fit the linear regression model
     print("\n✓Fitting linear regression model...")
     print("-" * 60)
-    model = LinearRegression(learning_rate=0.03, tolerance=1e-6, n_iterations=1000)
-    X = normalized_data['km'].values
-    y = normalized_data['price'].values
-    model.fit(X, y, data=data, norm_stat=norm_stat)
+    basis = None
+    if args.basis:
+        basis = make_basis(args.basis, normalized_data[features[0]].to_numpy(),
+                           degree=args.degree, n_knots=args.n_knots)
+        print(f"✓{args.basis} basis: {', '.join(basis_names(basis, features[0]))}")
+    model = build_model(args, basis=basis)
+    model.telemetry = telemetry
+    snapshots = None
+    if plot_enabled and worker is not None:
+        # Only (iteration, theta) is recorded during the fit, the figure is drawn afterwards
+        snapshots = FitSnapshots()
+        model.telemetry = telemetry if telemetry is not None else Telemetry()
+        model.telemetry.add_callback(snapshots.record, every=args.snapshot_every)
+    X = normalized_data[features].values
+    y = normalized_data[args.target].values
+    start = time.perf_counter()
+    with timed(telemetry, 'fit'):
+        if plot_enabled and worker is None:
+            # Live plotting is never offered in non-interactive mode
+            model.fit(X, y, data=data, norm_stat=norm_stat,
+                      plot_fit=False if args.non_interactive else None)
+        else:
+            model.fit(X, y)
+    training_seconds = time.perf_counter() - start
     print("✓Model fitted successfully.")
+    if telemetry is not None:
+        telemetry.record_fit(model)
+    if dtype is not None and not args.no_precision_check:
+        # Checked on a bounded sample, so that the float64 copies do not outgrow the float64 mode
+        rows = precision_rows(len(y), args.precision_sample_rows, args.seed)
+        sample = data if rows is None else data.iloc[rows]
+        # Reference data normalized in float64, to also measure the storage error
+        means = np.array([norm_stat[f'{column}_mean'] for column in features])
+        stds = np.array([norm_stat[f'{column}_std'] for column in features])
+        X_reference = (sample[features].to_numpy(dtype=np.float64) - means) / stds
+        y_reference = (sample[args.target].to_numpy(dtype=np.float64) - norm_stat[f'{args.target}_mean']) \
+            / norm_stat[f'{args.target}_std']
+        check_precision(model, X if rows is None else X[rows], y if rows is None else y[rows],
+                        r2_tolerance=args.r2_tolerance, theta_tolerance=args.theta_tolerance,
+                        X_reference=X_reference, y_reference=y_reference, refit=rows is not None)
+    if features == ['km'] and args.target == 'price' and basis is None \
+            and args.solver not in ROBUST_SOLVERS:
+        # Kept with the saved model so that it can be updated with --update_model
+        # (a least-squares refit, which would replace a robust fit)
+        model.stats = SufficientStats()
+        model.stats.update(data['km'].to_numpy(dtype=np.float64),
+                           data['price'].to_numpy(dtype=np.float64))
+    if snapshots is not None and snapshots.rows:
+        worker.submit(render_fit_snapshots, './plot/fit_evolution.png', data['km'].to_numpy(),
+                      data['price'].to_numpy(), snapshots.as_array(), norm_stat, basis, figsize=(12, 7))
 
 
     # Visualize the regression line
-    save_final_plot = input("\nDo you want to save the visualization of the final regression fit? (y/n): ").strip().lower() == 'y'
-    if save_final_plot:
-        plot_name = input("Enter the filename to save the regression plot (e.g., 'final_regression_fit.png'): ").strip()
-        plot_name = 'final_regression_fit.png' if not plot_name else plot_name
-        plt3 = plot_regression(data, model, norm_stat)
-        save_plot(plt3, f'./plot/{plot_name}')
-        plt3.close()
+    if plot_enabled:
+        plot_file = output_path(args, args.save_plot,
+                                "Do you want to save the visualization of the final regression fit?",
+                                "Enter the filename to save the regression plot",
+                                'final_regression_fit.png', './plot')
+        if plot_file and worker is not None:
+            worker.submit(render_regression, plot_file, data['km'].to_numpy(), data['price'].to_numpy(),
+                          model.theta.copy(), norm_stat, basis, figsize=(12, 7))
+        elif plot_file:
+            plt3 = plot_regression(data, model, norm_stat)
+            save_plot(plt3, plot_file)
+            plt3.close()
     
     # Visualize the cost history
-    save_cost_plot = input("\nDo you want to save the visualization of the cost history? (y/n): ").strip().lower() == 'y'
-    if save_cost_plot:
-        save_cost_filename = input("Enter the filename to save the cost history plot (e.g., 'cost_history.png'): ").strip()
-        save_cost_filename = 'cost_history.png' if not save_cost_filename else save_cost_filename
-        plt4 = plot_cost_history(model.cost_history)
-        save_plot(plt4, f'./plot/{save_cost_filename}')
-        plt4.close()
+    if not args.no_plots:
+        cost_plot_file = output_path(args, args.save_cost_plot,
+                                     "Do you want to save the visualization of the cost history?",
+                                     "Enter the filename to save the cost history plot",
+                                     'cost_history.png', './plot')
+        if cost_plot_file and worker is not None:
+            worker.submit(render_cost_history, cost_plot_file, model.cost_history)
+        elif cost_plot_file:
+            plt4 = plot_cost_history(model.cost_history)
+            save_plot(plt4, cost_plot_file)
+            plt4.close()
 
     # Save the model parameters
-    save_model_choice = input("\nDo you want to save the model parameters? (y/n): ").strip().lower() == 'y'
-    if save_model_choice:
-        model_filename = input("Enter the filename to save the model parameters (e.g., 'model_params.json'): ").strip()
-        model_filename = 'model_params.json' if not model_filename else model_filename
-        save_model(model, norm_stat, filename=f'./models/{model_filename}')
+    with timed(telemetry, 'save'):
+        ask_save_model(args, model, norm_stat)
+        if args.register:
+            data_file = args.data_file if args.data_file else './data/data.csv'
+            register_model(args, model, norm_stat, data_file, len(y),
+                           r2_score(model.theta, X, y, model.basis), training_seconds)
+    return 0
+
+
+def main(args):
+    if args.non_interactive and not args.no_plots:
+        # No GUI in headless jobs: figures are only rendered to files
+        import matplotlib
+        matplotlib.use('Agg')
+    telemetry = Telemetry() if args.telemetry else None
+    if telemetry is not None and args.telemetry_every:
+        telemetry.log_iterations(args.telemetry_every)
+    status = train(args, telemetry)
+    if telemetry is not None and status == 0:
+        telemetry.display()
+        telemetry.export(args.telemetry, fmt=args.telemetry_format)
+    return status
+
+
+def load_config(filename, parser):
+    """
+    Load training options from a JSON file whose keys are the command line
+    option names (e.g. {"solver": "normal", "save_model": "./models/m.json"}).
+    
+    Args:
+        filename (str): The JSON configuration file.
+        parser (argparse.ArgumentParser): The parser, used to validate the keys.
+        
+    Returns:
+        dict: The options, to be used as parser defaults.
+    """
+    try:
+        with open(filename) as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read config file '{filename}': {e}")
+    config = {key.replace('-', '_'): value for key, value in config.items()}
+    known = {action.dest for action in parser._actions}
+    unknown = sorted(set(config) - known)
+    if unknown:
+        parser.error(f"unknown option(s) in config file: {', '.join(unknown)}")
+    return config
 
 if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Train a linear regression model on the car dataset.")
     parser.add_argument('--data_file', type=str, help='Path to the CSV file containing the dataset')
+    parser.add_argument('--config', type=str,
+                        help='JSON file of options (keys are option names); command line options take precedence')
+    parser.add_argument('--non_interactive', action='store_true',
+                        help='Never prompt or open a window: outputs are only written where given by the options below')
+    parser.add_argument('--no_plots', action='store_true',
+                        help='Do not draw any plot')
+    parser.add_argument('--save_model', type=str,
+                        help='Path where the model parameters are saved, without asking')
+    parser.add_argument('--register', type=str,
+                        help='Also publish the model as a new version of this name in the registry')
+    parser.add_argument('--registry', type=str, default=DEFAULT_REGISTRY,
+                        help='Directory of the model registry (see model_registry.py)')
+    parser.add_argument('--save_plot', type=str,
+                        help='Path where the final regression plot is saved, without asking')
+    parser.add_argument('--save_cost_plot', type=str,
+                        help='Path where the cost history plot is saved, without asking')
+    parser.add_argument('--deferred_plots', action='store_true',
+                        help='Render the plots on a background thread (Agg, large scatters hexbinned) '
+                        'and record the fit every --snapshot_every iterations instead of live plotting')
+    parser.add_argument('--snapshot_every', type=int, default=10,
+                        help='Iterations between two parameter snapshots of --deferred_plots')
+    parser.add_argument('--learning_rate', type=float, default=0.03,
+                        help='Step size of the gradient descent solvers')
+    parser.add_argument('--tolerance', type=float, default=1e-6,
+                        help='Convergence threshold on the change of the cost')
+    parser.add_argument('--max_iter', type=int, default=1000,
+                        help='Maximum number of iterations (epochs for the sgd solver)')
+    parser.add_argument('--features', type=str, default='km',
+                        help='Comma-separated numeric feature columns (e.g. km,year,engine_size)')
+    parser.add_argument('--categorical', type=str, default='',
+                        help='Comma-separated categorical feature columns to one-hot encode (e.g. fuel_type)')
+    parser.add_argument('--target', type=str, default='price',
+                        help='Target column to predict')
+    parser.add_argument('--solver', type=str, choices=SOLVERS, default='gd',
+                        help='Method used to fit the model: gradient descent (gd), '
+                        'normal equation (normal), numpy least squares (lstsq), mini-batch (sgd) '
+                        'or robust fits: Huber loss (huber) and RANSAC (ransac)')
+    parser.add_argument('--gd_kernel', type=str, choices=GD_KERNELS, default='gram',
+                        help='gd solver implementation: O(1) iterations from precomputed moments (gram) '
+                        'or the loop over the data (reference)')
+    parser.add_argument('--basis', type=str, choices=BASIS_TYPES,
+                        help='Fit a curve of the single feature on a polynomial, piecewise-linear '
+                        '(linear_spline) or B-spline basis of its normalized values')
+    parser.add_argument('--degree', type=int, default=3,
+                        help='Degree of the polynomial / B-spline basis')
+    parser.add_argument('--n_knots', type=int, default=5,
+                        help='Number of interior knots of the spline bases, at quantiles of the feature')
+    parser.add_argument('--huber_delta', type=float, default=1.345,
+                        help='Huber threshold of the huber solver, in robust standard deviations of the residuals')
+    parser.add_argument('--ransac_trials', type=int, default=2000,
+                        help='Number of candidate lines scored by the ransac solver')
+    parser.add_argument('--ransac_threshold', type=float, default=2.0,
+                        help='Inlier threshold of the ransac solver, in robust standard deviations of the target')
+    parser.add_argument('--batch_size', type=int, default=32,
+                        help='Mini-batch size of the sgd solver')
+    parser.add_argument('--lr_schedule', type=str, choices=LR_SCHEDULES, default='constant',
+                        help='Learning-rate schedule over epochs of the sgd solver')
+    parser.add_argument('--optimizer', type=str, choices=OPTIMIZERS, default='sgd',
+                        help='Update rule of the sgd solver')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the shuffling generator of the sgd solver')
+    parser.add_argument('--history', type=str, choices=HISTORY_MODES, default='full',
+                        help='Retention of the cost history: every iteration (full), one every '
+                        '--history_every iterations (every), or the last --history_size ones '
+                        'plus a min/max envelope (ring)')
+    parser.add_argument('--history_every', type=int, default=10,
+                        help='Sampling period of the "every" cost history')
+    parser.add_argument('--history_size', type=int, default=1000,
+                        help='Length of the "ring" cost history')
+    parser.add_argument('--dtype', type=str, choices=DTYPES, default='float64',
+                        help='Float dtype of the data columns; float32 halves memory, the '
+                        'reductions being accumulated in float64')
+    parser.add_argument('--no_precision_check', action='store_true',
+                        help='Do not compare a float32 fit with a float64 one')
+    parser.add_argument('--precision_sample_rows', type=int, default=100000,
+                        help='Number of rows the precision check refits the model on in float32 '
+                        'and float64 when there are more (0: check the fit itself on every row)')
+    parser.add_argument('--r2_tolerance', type=float, default=1e-4,
+                        help='Maximum R² drift of a float32 fit before a warning')
+    parser.add_argument('--theta_tolerance', type=float, default=1e-3,
+                        help='Maximum parameter drift of a float32 fit before a warning')
+    parser.add_argument('--ingest', action='store_true',
+                        help='Parse the CSV in parallel byte ranges, quarantining rows with a missing, '
+                        'non-numeric or negative feature / target instead of failing')
+    parser.add_argument('--quarantine_file', type=str,
+                        help='CSV file receiving the rejected rows (default: <data_file>.quarantine.csv)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of parsing threads of --ingest (default: one per core)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Memory-map a binary cache of the CSV, built on first use')
+    parser.add_argument('--group_by', type=str,
+                        help='Fit one model per value of this column (e.g. make), all groups in one pass')
+    parser.add_argument('--stream', action='store_true',
+                        help='Train from chunked reads of the CSV without loading it in memory')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Number of rows read per chunk in streaming mode')
+    parser.add_argument('--update_model', type=str,
+                        help='Update this saved km -> price model with the rows of --data_file only '
+                        '(saved back to it unless --save_model is given)')
+    parser.add_argument('--forgetting_factor', type=float, default=1.0,
+                        help='Weight kept by the previous observations on --update_model, in (0, 1]')
+    parser.add_argument('--telemetry', type=str,
+                        help='File receiving the phase timings and iteration telemetry of the run')
+    parser.add_argument('--telemetry_format', type=str, choices=EXPORT_FORMATS, default='jsonl',
+                        help='jsonl (one line appended per run) or prometheus (text exposition format)')
+    parser.add_argument('--telemetry_every', type=int, default=0,
+                        help='Also record the cost and parameters every N iterations')
+    parser.add_argument('--profile', type=str, choices=PROFILERS,
+                        help='Run the training under cProfile or tracemalloc')
+    parser.add_argument('--profile_output', type=str, help='File receiving the profile data')
     args = parser.parse_args()
-    main(args)
+    if args.config:
+        parser.set_defaults(**load_config(args.config, parser))
+        args = parser.parse_args()
+    if args.profile:
+        sys.exit(run_profiled(main, args, profiler=args.profile, output=args.profile_output))
+    sys.exit(main(args))
     
\ No newline at end of file
@@ -0,0 +1,320 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    model_registry.py                                  :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:40:15 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:05:36 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module implements a local registry of versioned models.
+Each registered model is stored once under its content hash, with the
+metadata of its training (dataset fingerprint, row count, R², training time,
+hyperparameters), and an indexed manifest per model name points to the
+'latest' and 'best' (highest R²) versions:
+
+    <registry>/<name>/manifest.json             versions, hashes, latest, best, history
+    <registry>/<name>/versions/v0003-<hash>.json  immutable model files
+    <registry>/<name>/latest.json               copy of the latest version
+
+Every file is published with an atomic rename (model_saver.write_json), the
+version file before the manifest that references it, so a reader never sees
+a partial model or a manifest pointing to a missing file. Writers of a name
+are serialized by a lock file. A serving process can watch latest.json with
+load_compiled_model: it is reloaded when a new version is registered or
+rolled back, without rescanning the versions.
+
+Usage:
+    python src/model_registry.py list km_price
+    python src/model_registry.py show km_price@best
+    python src/model_registry.py rollback km_price [--to v2]
+"""
+
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import sys
+from model_saver import write_json, load_model
+
+DEFAULT_REGISTRY = './models/registry'
+# Metadata compared to elect the 'best' version (higher is better)
+BEST_METRIC = 'r2'
+# Size of the chunks read to hash a dataset
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def content_hash(params):
+    """
+    SHA-256 of the canonical JSON of the model parameters, so the same model
+    registered twice is stored once.
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def dataset_fingerprint(filepath):
+    """
+    Identify the training data by its path, size, mtime and SHA-256 content hash.
+    
+    Args:
+        filepath (str): The path to the dataset file.
+        
+    Returns:
+        dict: source, size, mtime_ns and sha256.
+    """
+    # Imported here so that reading the registry does not load pandas
+    from data_loader import source_fingerprint
+
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return dict(source_fingerprint(filepath), sha256=digest.hexdigest())
+
+
+def parse_reference(reference):
+    """
+    Split a model reference 'name@ref' into (name, ref), ref defaulting to 'latest'.
+    """
+    name, _, ref = reference.partition('@')
+    return name, ref or 'latest'
+
+
+class ModelRegistry:
+    """
+    Versioned model files of a registry directory.
+    
+    Arguments:
+    root (str): The registry directory, created on first registration.
+    """
+    def __init__(self, root=DEFAULT_REGISTRY):
+        self.root = root
+
+    def model_dir(self, name):
+        """Directory of the versions of a model name."""
+        return os.path.join(self.root, name)
+
+    def manifest(self, name):
+        """
+        Read the manifest of a model name.
+        
+        Returns:
+            dict: latest, best, next_version, versions (id -> entry), hashes
+            (content hash -> id) and history (successive latest ids).
+        """
+        try:
+            with open(os.path.join(self.model_dir(name), 'manifest.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'name': name, 'latest': None, 'best': None, 'next_version': 1,
+                    'versions': {}, 'hashes': {}, 'history': []}
+
+    @contextlib.contextmanager
+    def locked(self, name):
+        """
+        Serialize the writers of a model name with an exclusive file lock
+        (fcntl.flock, or msvcrt.locking on Windows). The lock modules are
+        imported here so that readers of the registry import on every platform.
+        """
+        os.makedirs(os.path.join(self.model_dir(name), 'versions'), exist_ok=True)
+        with open(os.path.join(self.model_dir(name), '.lock'), 'w') as lock:
+            if sys.platform == 'win32':
+                import msvcrt
+                while True:
+                    # LK_LOCK gives up after 10 seconds: keep waiting like flock
+                    try:
+                        msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass
+                try:
+                    yield
+                finally:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def publish(self, name, manifest):
+        """Point latest.json to the latest version, then replace the manifest."""
+        directory = self.model_dir(name)
+        entry = manifest['versions'][manifest['latest']]
+        with open(os.path.join(directory, entry['file']), 'r') as f:
+            params = json.load(f)
+        write_json(params, os.path.join(directory, 'latest.json'))
+        write_json(manifest, os.path.join(directory, 'manifest.json'))
+
+    def register(self, name, params, metadata=None):
+        """
+        Register model parameters as the latest version of name. Parameters
+        already registered keep their version, which becomes the latest again.
+        
+        Args:
+            name (str): The model name.
+            params (dict): The model parameters (model_saver.model_params).
+            metadata (dict): Training metadata, e.g. dataset, rows, r2, training_seconds.
+            
+        Returns:
+            str: The version id (e.g. 'v3').
+        """
+        digest = content_hash(params)
+        with self.locked(name):
+            manifest = self.manifest(name)
+            version = manifest['hashes'].get(digest)
+            if version is None:
+                version = f"v{manifest['next_version']}"
+                filename = os.path.join('versions', f"v{manifest['next_version']:04d}-{digest[:12]}.json")
+                write_json(params, os.path.join(self.model_dir(name), filename))
+                manifest['next_version'] += 1
+                manifest['hashes'][digest] = version
+                manifest['versions'][version] = {
+                    'file': filename,
+                    'hash': digest,
+                    'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                    'metadata': metadata or {}
+                }
+                score = (metadata or {}).get(BEST_METRIC)
+                best = manifest['best']
+                if score is not None and (best is None or score >
+                                          manifest['versions'][best]['metadata'].get(BEST_METRIC, float('-inf'))):
+                    manifest['best'] = version
+            if manifest['latest'] != version:
+                manifest['history'].append(version)
+            manifest['latest'] = version
+            self.publish(name, manifest)
+        return version
+
+    @staticmethod
+    def version_of(manifest, ref):
+        """
+        Version id of a reference: 'latest', 'best', a version id ('v3') or a
+        prefix of a content hash. None if unknown or ambiguous.
+        """
+        if ref in ('latest', 'best'):
+            return manifest[ref]
+        if ref in manifest['versions']:
+            return ref
+        matches = [v for digest, v in manifest['hashes'].items() if digest.startswith(ref)]
+        return matches[0] if len(matches) == 1 else None
+
+    def resolve(self, name, ref='latest'):
+        """
+        Path of a version of name from the manifest, without scanning the versions.
+        
+        Args:
+            name (str): The model name.
+            ref (str): 'latest' (the latest.json copy, reloaded on updates), 'best',
+            a version id ('v3') or a prefix of a content hash.
+            
+        Returns:
+            str: The model file, or None if the reference is unknown.
+        """
+        manifest = self.manifest(name)
+        version = self.version_of(manifest, ref)
+        if version is None:
+            return None
+        if ref == 'latest':
+            return os.path.join(self.model_dir(name), 'latest.json')
+        return os.path.join(self.model_dir(name), manifest['versions'][version]['file'])
+
+    def load(self, reference):
+        """
+        Load the parameters of a model reference 'name@ref' (see resolve).
+        
+        Returns:
+            dict: The model parameters, or None if the reference is unknown.
+        """
+        name, ref = parse_reference(reference)
+        filename = self.resolve(name, ref)
+        if filename is None:
+            print(f"✗ Unknown model '{reference}' in registry '{self.root}'")
+            return None
+        return load_model(filename)
+
+    def rollback(self, name, version=None):
+        """
+        Make the previous latest version (or the given one) the latest again.
+        
+        Args:
+            name (str): The model name.
+            version (str): The version id to restore, None for the previous latest.
+            
+        Returns:
+            str: The restored version id, or None if there is nothing to roll back to.
+        """
+        with self.locked(name):
+            manifest = self.manifest(name)
+            if version is None:
+                if len(manifest['history']) < 2:
+                    return None
+                manifest['history'].pop()
+                version = manifest['history'][-1]
+            elif version not in manifest['versions']:
+                return None
+            elif version != manifest['latest']:
+                manifest['history'].append(version)
+            manifest['latest'] = version
+            self.publish(name, manifest)
+        return version
+
+
+def display_versions(manifest):
+    """Print the versions of a manifest with their metadata."""
+    print(f"\nMODEL '{manifest['name']}'")
+    print("=" * 60)
+    for version, entry in manifest['versions'].items():
+        metadata = entry['metadata']
+        tags = [tag for tag in ('latest', 'best') if manifest[tag] == version]
+        r2 = f"R² {metadata['r2']:.6f}" if 'r2' in metadata else 'R² -'
+        rows = f"{metadata['rows']:,} rows" if 'rows' in metadata else ''
+        print(f"  {version:<6} {entry['hash'][:12]}  {entry['created']}  {r2}  {rows}"
+              f"{'  (' + ', '.join(tags) + ')' if tags else ''}")
+    print("=" * 60)
+
+
+def main(args):
+    """List, show or roll back the versions of a registered model."""
+    registry = ModelRegistry(args.registry)
+    name, ref = parse_reference(args.model)
+    manifest = registry.manifest(name)
+    if not manifest['versions']:
+        print(f"✗ No model '{name}' in registry '{args.registry}'")
+        return 1
+    if args.command == 'list':
+        display_versions(manifest)
+    elif args.command == 'show':
+        version = registry.version_of(manifest, ref)
+        if version is None:
+            print(f"✗ Unknown version '{ref}' of model '{name}'")
+            return 1
+        print(json.dumps(dict(manifest['versions'][version], version=version,
+                              path=registry.resolve(name, ref)), indent=4))
+    else:
+        version = registry.rollback(name, args.to)
+        if version is None:
+            print(f"✗ Nothing to roll back to for model '{name}'")
+            return 1
+        print(f"✓ Model '{name}' rolled back to {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage the versions of the model registry.")
+    parser.add_argument('command', choices=('list', 'show', 'rollback'),
+                        help='list the versions, show one (name@latest|best|vN|hash) or roll back the latest')
+    parser.add_argument('model', type=str, help='Model name, or name@ref for show')
+    parser.add_argument('--to', type=str, help='Version id restored by rollback (default: the previous latest)')
+    parser.add_argument('--registry', type=str, default=DEFAULT_REGISTRY,
+                        help='Registry directory')
+    sys.exit(main(parser.parse_args()))
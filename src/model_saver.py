@@ -6,7 +6,7 @@
 #    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/06 13:42:35 by tissad            #+#    #+#              #
-#    Updated: 2026/02/06 14:03:21 by tissad           ###   ########.fr        #
+#    Updated: 2026/10/18 15:05:50 by tissad           ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
@@ -17,9 +17,78 @@ This module provides functions to save and load the parameters of a linear
 regression model.
 It uses JSON format for saving the model parameters and normalization 
 statistics,
+The parameters are stored as theta0 (intercept), theta1 ... thetaN (one per
+feature column, in the order of the 'features' list). A model fitted on a
+basis of its feature (see basis.py) also stores the basis spec, its
+parameters being theta1 ... thetaN over the expanded columns.
+The files are written atomically (temporary file then rename), so a process
+loading or watching a model never reads a half-written file; versioned
+copies are published by model_registry.py.
+CompiledModel folds the normalization and the parameters into a single
+intercept and slope in raw units for fast repeated predictions, and reloads
+the model file when it changes.
 """
 
 import json
+import os
+import time
+import numpy as np
+from basis import expand, basis_size
+
+# Used to print the parameter names as θ₀, θ₁, ...
+SUBSCRIPT_DIGITS = str.maketrans('0123456789', '₀₁₂₃₄₅₆₇₈₉')
+
+def write_json(data, filename, indent=4):
+    """
+    Write a JSON file atomically: the data is written and flushed to a
+    temporary file of the same directory, which then replaces filename in
+    one rename, so readers see either the previous or the new content.
+    
+    Args:
+        data (dict): The JSON-serializable content.
+        filename (str): The destination file.
+        indent (int): Indentation of the JSON output, None for a compact file.
+    """
+    tmp_file = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, filename)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def model_params(model, stats):
+    """
+    Build the JSON-serializable parameters of a model, as saved by save_model.
+    
+    Args:
+        model: The fitted linear regression model.
+        stats (dict): The normalization statistics returned by normalize_data.
+        
+    Returns:
+        dict: theta0 ... thetaN, the statistics of each column, features, target...
+    """
+    features = stats.get('features', ['km'])
+    target = stats.get('target', 'price')
+    params = {f'theta{i}': float(t) for i, t in enumerate(model.theta)}
+    for column in features + [target]:
+        params[f'{column}_mean'] = float(stats[f'{column}_mean'])
+        params[f'{column}_std'] = float(stats[f'{column}_std'])
+    params['features'] = features
+    params['target'] = target
+    params['categorical'] = stats.get('categorical', [])
+    if getattr(model, 'basis', None) is not None:
+        params['basis'] = model.basis
+    if getattr(model, 'stats', None) is not None:
+        # Accumulated km / price statistics, for incremental updates
+        params['sufficient_stats'] = model.stats.to_dict()
+    return params
+
 
 def save_model(model, stats, filename='model_params.json'):
     """
@@ -27,21 +96,11 @@ def save_model(model, stats, filename='model_params.json'):
     
     Args:
         model: The linear regression model object containing the parameters to be saved.
-        stats (dict): A dictionary containing the normalization statistics (mean and std for km and price).
+        stats (dict): A dictionary containing the normalization statistics (mean and std of
+        each feature and of the target, as returned by normalize_data).
         filename (str): The name of the file where the model parameters will be saved.
     """
-    params = {
-        'theta0': model.theta0,
-        'theta1': model.theta1,
-        'km_mean': stats['km_mean'],
-        'km_std': stats['km_std'],
-        'price_mean': stats['price_mean'],
-        'price_std': stats['price_std']
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(params, f, indent=4)
-    
+    write_json(model_params(model, stats), filename)
     print(f"✓ Model saved: {filename}")
 
 
@@ -58,6 +117,10 @@ def load_model(filename='model_params.json'):
     try:
         with open(filename, 'r') as f:
             params = json.load(f)
+        # Models saved before multivariate support only have the km feature
+        params.setdefault('features', ['km'])
+        params.setdefault('target', 'price')
+        params.setdefault('categorical', [])
         print(f"✓ Model loaded: {filename}")
         return params
     except FileNotFoundError:
@@ -65,24 +128,291 @@ def load_model(filename='model_params.json'):
         return None
     
 
+def get_theta(params):
+    """
+    Return the parameter vector [theta0, theta1, ..., thetaN] of a loaded model
+    
+    Args:
+        params (dict): Paramètres du modèle
+        
+    Returns:
+        list: theta0 then one weight per feature (per basis column with a basis)
+    """
+    if 'basis' in params:
+        n_features = basis_size(params['basis'])
+    else:
+        n_features = len(params.get('features', ['km']))
+    return [params[f'theta{i}'] for i in range(n_features + 1)]
+
+
 def predict_price(km, params):
     """
     Prédit le prix pour un kilométrage donné
     
     Args:
-        km (float): Kilométrage
+        km (float, np.array or dict): Kilométrage, ou pour un modèle à plusieurs
+        variables un dict / DataFrame {colonne: valeurs} contenant chaque feature
         params (dict): Paramètres du modèle
         
     Returns:
         float: Prix prédit
     """
-    # Normalisation
-    km_norm = (km - params['km_mean']) / params['km_std']
-    
-    # Prédiction normalisée
-    price_norm = params['theta0'] + params['theta1'] * km_norm
+    features = params.get('features', ['km'])
+    target = params.get('target', 'price')
+    if isinstance(km, dict) or hasattr(km, 'columns'):
+        values = [km[feature] for feature in features]
+    elif len(features) == 1:
+        values = [km]
+    else:
+        raise ValueError(f"Model expects the features {features}, got a single value")
+    theta = get_theta(params)
+
+    if 'basis' in params:
+        value_norm = (np.asarray(values[0], dtype=np.float64) - params[f'{features[0]}_mean']) \
+            / params[f'{features[0]}_std']
+        price_norm = theta[0] + expand(value_norm, params['basis']) @ np.asarray(theta[1:])
+        if np.ndim(values[0]) == 0:
+            price_norm = float(price_norm[0])
+        return price_norm * params[f'{target}_std'] + params[f'{target}_mean']
+
+    price_norm = theta[0]
+    for weight, feature, value in zip(theta[1:], features, values):
+        # Normalisation puis prédiction normalisée
+        value_norm = (value - params[f'{feature}_mean']) / params[f'{feature}_std']
+        price_norm = price_norm + weight * value_norm
     
     # Dénormalisation
-    price = price_norm * params['price_std'] + params['price_mean']
+    price = price_norm * params[f'{target}_std'] + params[f'{target}_mean']
     
     return price
+
+
+def save_group_models(table, filename, feature='km', target='price'):
+    """
+    Save the per-group parameters returned by linear_regression.fit_groups as a
+    compact columnar JSON file (one list per column instead of one object per group)
+    
+    Args:
+        table (pd.DataFrame): One row per group, indexed by group key.
+        filename (str): The name of the file where the parameters will be saved.
+        feature (str): The feature column of the models.
+        target (str): The target column of the models.
+    """
+    params = {
+        'group_column': table.index.name,
+        'features': [feature],
+        'target': target,
+        'groups': table.index.tolist(),
+        'columns': {column: table[column].tolist() for column in table.columns}
+    }
+    write_json(params, filename, indent=None)
+    print(f"✓ {len(table)} group models saved: {filename}")
+
+
+def load_group_models(filename):
+    """
+    Load per-group parameters saved by save_group_models
+    
+    Args:
+        filename (str): The name of the file from which the parameters will be loaded.
+        
+    Returns:
+        Tuple: (table, meta) where table is a DataFrame indexed by group key and meta
+        holds 'group_column', 'features' and 'target', or None if the file is not found.
+    """
+    import pandas as pd
+
+    try:
+        with open(filename, 'r') as f:
+            params = json.load(f)
+    except FileNotFoundError:
+        print(f"✗ File '{filename}' not found")
+        return None
+    table = pd.DataFrame(params['columns'],
+                         index=pd.Index(params['groups'], name=params['group_column']))
+    meta = {key: params[key] for key in ('group_column', 'features', 'target')}
+    print(f"✓ {len(table)} group models loaded: {filename}")
+    return table, meta
+
+
+def group_params(table, meta, group):
+    """
+    Extract the parameters of one group in the format of load_model, so they can be
+    used with predict_price or CompiledModel
+    
+    Returns:
+        dict: Paramètres du modèle du groupe
+    """
+    params = {column: float(value) for column, value in table.loc[group].items() if column != 'n'}
+    params.update(features=meta['features'], target=meta['target'], categorical=[])
+    return params
+
+
+def predict_group_prices(groups, km, table, meta):
+    """
+    Prédit le prix de chaque ligne avec le modèle de son groupe, en une seule opération vectorisée
+    
+    Args:
+        groups (array-like): Clé de groupe de chaque ligne
+        km (np.array): Valeur de la feature de chaque ligne
+        table (pd.DataFrame): Paramètres par groupe (load_group_models)
+        meta (dict): Métadonnées des modèles (load_group_models)
+        
+    Returns:
+        np.array: Prix prédits, NaN pour les groupes inconnus
+    """
+    feature = meta['features'][0]
+    target = meta['target']
+    rows = table.index.get_indexer(groups)
+    known = rows >= 0
+    rows = np.where(known, rows, 0)
+    def column(name):
+        return table[name].to_numpy(dtype=np.float64)[rows]
+    km_norm = (np.asarray(km, dtype=np.float64) - column(f'{feature}_mean')) / column(f'{feature}_std')
+    price = (column('theta0') + column('theta1') * km_norm) * column(f'{target}_std') + column(f'{target}_mean')
+    return np.where(known, price, np.nan)
+
+
+class CompiledModel:
+    """
+    Predictor built from load_model output where the chain
+    normalize -> linear model -> denormalize is folded into one intercept
+    and one slope per feature in raw units:
+        price = intercept + Σ slope_i * x_i
+    A model fitted on a basis of its feature cannot be folded that way: its
+    expanded columns are weighted by weights in normalized units, the
+    intercept and the scale carrying the denormalization of the target.
+    
+    When built from a file, the file modification time is checked at most
+    every check_interval seconds and the model is recompiled when a new
+    version has been saved, so long-running consumers need no restart.
+    
+    Arguments:
+    params (dict): The model parameters returned by load_model.
+    filename (str): The model file to watch, or None to disable reloading.
+    check_interval (float): Minimum number of seconds between two mtime checks.
+    mtime (int): st_mtime_ns of the file taken before params were read from it,
+    so that a version saved during the load is picked up by the next check.
+    """
+    __slots__ = ('params', 'features', 'target', 'intercept', 'slopes', 'slope',
+                 'basis', 'weights', 'scale', 'filename', 'mtime', 'check_interval', 'next_check')
+
+    def __init__(self, params, filename=None, check_interval=1.0, mtime=None):
+        self.filename = filename
+        self.check_interval = check_interval
+        self.mtime = mtime
+        self.next_check = time.monotonic() + check_interval
+        self.compile(params)
+
+    def compile(self, params):
+        """
+        Fold the normalization statistics into the parameters.
+        
+        Args:
+            params (dict): Paramètres du modèle
+        """
+        theta = get_theta(params)
+        features = params.get('features', ['km'])
+        target = params.get('target', 'price')
+        target_mean = params[f'{target}_mean']
+        target_std = params[f'{target}_std']
+        slopes = np.array([target_std * t / params[f'{f}_std'] for t, f in zip(theta[1:], features)])
+        self.params = params
+        self.features = features
+        self.target = target
+        self.basis = params.get('basis')
+        if self.basis is not None:
+            self.weights = target_std * np.asarray(theta[1:])
+            self.scale = params[f'{features[0]}_std']
+            self.intercept = float(target_mean + target_std * theta[0])
+            self.slopes = self.weights
+            self.slope = float(self.weights[0])
+            return
+        self.slopes = slopes
+        self.slope = float(slopes[0])
+        self.intercept = float(target_mean + target_std * theta[0]
+                               - sum(s * params[f'{f}_mean'] for s, f in zip(slopes, features)))
+
+    def refresh(self):
+        """
+        Recompile the model if its file was modified since the last load.
+        A file that cannot be read (e.g. being written) keeps the current model.
+        
+        Returns:
+            bool: True if a new version was loaded.
+        """
+        if self.filename is None or time.monotonic() < self.next_check:
+            return False
+        self.next_check = time.monotonic() + self.check_interval
+        try:
+            mtime = os.stat(self.filename).st_mtime_ns
+            if mtime == self.mtime:
+                return False
+            params = load_model(self.filename)
+            if params is None:
+                return False
+            self.compile(params)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ Reload of '{self.filename}' failed, keeping the current model: {e}")
+            return False
+        self.mtime = mtime
+        return True
+
+    def predict(self, X):
+        """
+        Predict the price of one or many cars.
+        
+        Args:
+            X (float, np.array or dict): Kilométrage (scalaire ou tableau) pour un modèle
+            à une variable, un tableau (m, n_features) ou un dict / DataFrame {colonne: valeurs}
+            
+        Returns:
+            float or np.array: Prix prédit
+        """
+        self.refresh()
+        if self.basis is not None:
+            return self.predict_basis(X)
+        if isinstance(X, dict) or hasattr(X, 'columns'):
+            price = self.intercept
+            # Python floats keep the dtype of the columns (e.g. float32)
+            for slope, feature in zip(self.slopes.tolist(), self.features):
+                price = price + slope * X[feature]
+            return price
+        if len(self.features) == 1 and np.ndim(X) < 2:
+            return self.intercept + self.slope * X
+        return self.intercept + np.asarray(X) @ self.slopes
+
+
+    def predict_basis(self, X):
+        """Prediction of a model fitted on a basis of its single feature."""
+        if isinstance(X, dict) or hasattr(X, 'columns'):
+            X = X[self.features[0]]
+        x = np.asarray(X)
+        x_norm = (x.astype(np.float64) - self.params[f'{self.features[0]}_mean']) / self.scale
+        price = self.intercept + expand(x_norm, self.basis) @ self.weights
+        if np.ndim(X) == 0:
+            return float(price[0])
+        # Keep the dtype of the input (e.g. float32) like the linear path
+        return price.astype(x.dtype, copy=False) if x.dtype.kind == 'f' else price
+
+
+def load_compiled_model(filename='model_params.json', check_interval=1.0):
+    """
+    Load a model file as a CompiledModel that reloads itself when the file changes
+    
+    Args:
+        filename (str): The name of the file from which the model parameters will be loaded.
+        check_interval (float): Minimum number of seconds between two checks of the file.
+        
+    Returns:
+        CompiledModel: The compiled predictor, or None if the file is not found.
+    """
+    # Stat before reading, as refresh does, so a save racing the load is not missed
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+    except OSError:
+        mtime = None
+    params = load_model(filename)
+    if params is None:
+        return None
+    return CompiledModel(params, filename=filename, check_interval=check_interval, mtime=mtime)
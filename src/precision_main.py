@@ -6,19 +6,23 @@
 #    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/06 14:46:27 by tissad            #+#    #+#              #
-#    Updated: 2026/02/06 15:31:14 by tissad           ###   ########.fr        #
+#    Updated: 2026/10/18 14:53:59 by tissad           ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
 """
 This module serves as the entry point for evaluating the precision of the linear regression model.
 It loads the model parameters and normalization statistics from a JSON file,
+and can estimate the stability of the model with k-fold cross-validation and
+bootstrap confidence intervals (see validation.py).
+The test set is normalized with the statistics saved with the model; large
+test sets can be evaluated in one streamed pass (see evaluation.py).
 """
 
-import pandas as pd
 import numpy as np
-from model_saver import load_model
-from data_loader import load_data, normalize_data, get_statistics
+from model_saver import load_model, get_theta, SUBSCRIPT_DIGITS, CompiledModel
+from data_loader import load_data, get_statistics, prepare_features
+from basis import expand
 
 
 def score(model, X, y):
@@ -26,13 +30,18 @@ def score(model, X, y):
     Compute the R² score of the model on the given data.
     
     Args:
-        X (np.array): Features
+        X (np.array): Features, (m,) for a single feature or (m, n_features)
         y (np.array): true target values
         
     Returns:
         float: R² score
     """
-    y_pred = model['theta0'] + model['theta1'] * X
+    theta = np.asarray(get_theta(model))
+    X = np.asarray(X)
+    if 'basis' in model:
+        # Polynomial / spline model: weights of the expanded columns
+        X = expand(X, model['basis'])
+    y_pred = theta[0] + (X @ theta[1:] if X.ndim == 2 else theta[1] * X)
     ss_res = np.sum((y - y_pred) ** 2) # Residual sum of squares
     ss_tot = np.sum((y - np.mean(y)) ** 2) # Total sum of squares
     r2 = 1 - (ss_res / ss_tot) # R² score calculation
@@ -49,22 +58,37 @@ def main(args):
         print("✗ Failed to load model parameters. Exiting.")
         return 1
     print("\n✓ Model parameters loaded successfully.")
-    print(f"  - θ₀: {params['theta0']:.6e}")
-    print(f"  - θ₁: {params['theta1']:.6e}")
+    for i, theta in enumerate(get_theta(params)):
+        print(f"  - θ{str(i).translate(SUBSCRIPT_DIGITS)}: {theta:.6e}")
+    data_file = args.data_file if args.data_file else './data/data.csv'
+    if args.stream:
+        # Imported here so the in-memory evaluation does not load the sketch machinery
+        from evaluation import evaluate_stream, display_metrics
+        print(f"\nStreaming '{data_file}' in chunks of {args.chunksize} rows...")
+        result = evaluate_stream(params, data_file, chunksize=args.chunksize)
+        if result is None:
+            return 1
+        metrics, skipped = result
+        display_metrics(metrics.results(), skipped)
+        return 0
     # Load the dataset
     print("\nLoading dataset...")
-    data_file = args.data_file if args.data_file else './data/data.csv'
-    data = load_data(data_file)
+    data = load_data(data_file, use_cache=args.cache)
     if data is None:
         print("✗ Failed to load dataset. Exiting.")
         return 1
     print("✓ Dataset loaded successfully.")
-    # Normalize the dataset
+    # Normalize the dataset with the statistics of the training data
     print("\nNormalizing dataset...")
-    normalized_data, norm_stat = normalize_data(data)
-    print("✓ Dataset normalized successfully.")
-    X = normalized_data['km'].values    
-    y = normalized_data['price'].values
+    features = params['features']
+    data = prepare_features(data, features, params['categorical'])
+    columns = features + [params['target']]
+    means = np.array([params[f'{column}_mean'] for column in columns])
+    stds = np.array([params[f'{column}_std'] for column in columns])
+    normalized = (data[columns].to_numpy(dtype=np.float64) - means) / stds
+    print("✓ Dataset normalized with the model statistics.")
+    X = normalized[:, :-1]
+    y = normalized[:, -1]
     # Evaluate the model's precision
     r2_score = score(params, X, y)
     print(f"\nModel R² score: {r2_score:.6f}")
@@ -74,13 +98,52 @@ def main(args):
         print("  → Not bad! Decent fit! 👍")
     else:
         print("  → Needs improvement! Poor fit! 😕")
+
+    if args.kfold or args.bootstrap:
+        # Imported here so the plain evaluation does not load the thread pool machinery
+        from validation import cross_validate, bootstrap, display_intervals,\
+            normal_interval, percentile_interval
+        X_raw = data[features].to_numpy(dtype=np.float64)
+        y_raw = data[params['target']].to_numpy(dtype=np.float64)
+    if args.kfold:
+        basis = f", {params['basis']['type']} basis" if 'basis' in params else ''
+        print(f"\nRunning {args.kfold}-fold cross-validation ({args.solver}{basis})...")
+        # A basis model is cross-validated on the same basis, refitted per fold
+        folds = cross_validate(X_raw, y_raw, k=args.kfold, solver=args.solver,
+                               seed=args.seed, workers=args.workers, basis=params.get('basis'))
+        display_intervals(f"{args.kfold}-FOLD CROSS-VALIDATION", folds, normal_interval, args.confidence)
+    if args.bootstrap:
+        print(f"\nRunning {args.bootstrap} bootstrap replicates of the saved model...")
+        y_pred = CompiledModel(params).predict(X_raw)
+        replicates = bootstrap(y_raw, y_pred, n_replicates=args.bootstrap, n_blocks=args.n_blocks,
+                               seed=args.seed, workers=args.workers)
+        display_intervals(f"BOOTSTRAP ({args.bootstrap} replicates)", replicates,
+                          percentile_interval, args.confidence)
     return 0
 
 if __name__ == "__main__":
     import argparse
+    import sys
     parser = argparse.ArgumentParser(description="Evaluate the precision of the linear regression model.")
     parser.add_argument('--model_file', type=str, help='Path to the model parameters JSON file')
     parser.add_argument('--data_file', type=str, help='Path to the CSV file containing the dataset')
+    parser.add_argument('--cache', action='store_true',
+                        help='Memory-map a binary cache of the CSV, built on first use')
+    parser.add_argument('--stream', action='store_true',
+                        help='Evaluate in one pass over chunks of the file, in constant memory')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Number of rows read per chunk with --stream')
+    parser.add_argument('--kfold', type=int, default=0,
+                        help='Run k-fold cross-validation with this number of folds')
+    parser.add_argument('--solver', type=str, choices=('gd', 'normal', 'lstsq'), default='normal',
+                        help='Solver used to refit the model on each fold')
+    parser.add_argument('--bootstrap', type=int, default=0,
+                        help='Number of bootstrap replicates of the saved model metrics')
+    parser.add_argument('--n_blocks', type=int, default=1000,
+                        help='Number of random row blocks resampled by the bootstrap')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the intervals')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the folds and of the bootstrap')
+    parser.add_argument('--workers', type=int, default=None, help='Number of threads')
     args = parser.parse_args()
-    main(args)
+    sys.exit(main(args))
     
\ No newline at end of file
@@ -6,7 +6,7 @@
 #    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/06 14:01:31 by tissad            #+#    #+#              #
-#    Updated: 2026/02/06 14:29:05 by tissad           ###   ########.fr        #
+#    Updated: 2026/10/18 15:02:19 by tissad           ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
@@ -15,16 +15,86 @@
 This module serves as the entry point for making predictions using a saved linear regression model.
 It loads the model parameters and normalization statistics from a JSON file,
 normalizes the input data, and uses the model to make predictions.
+Predictions are either made interactively or in batch mode, scoring a whole
+CSV file chunk by chunk with vectorized NumPy operations.
+The interactive mode only depends on the standard library and NumPy: pandas
+is imported by the batch mode when it reads a CSV file.
 """
-import pandas as pd
-from model_saver import load_model, predict_price
+import time
+import numpy as np
+from model_saver import load_model, get_theta, SUBSCRIPT_DIGITS, CompiledModel
+from model_registry import ModelRegistry, DEFAULT_REGISTRY
+
+
+def predict_batch(params, input_file, output_file, chunksize=100000, dtype=np.float64):
+    """
+    Score every row of a CSV file and write the rows with their predicted
+    price to another CSV file, one chunk at a time so memory stays bounded.
+    
+    Rows with a missing, non-numeric or negative mileage, and rows whose
+    predicted price is negative, get an empty prediction, like the values
+    refused by the interactive mode.
+    
+    Args:
+        params (dict): Paramètres du modèle
+        input_file (str): The CSV file containing the feature columns.
+        output_file (str): The CSV file where the predictions are written.
+        chunksize (int): Number of rows scored per chunk.
+        dtype (np.dtype): Float dtype of the features and predictions (e.g. np.float32).
+        
+    Returns:
+        int: 0 on success, 1 if the input file cannot be read.
+    """
+    # Only the batch mode reads CSV files through pandas
+    import pandas as pd
+    from data_loader import prepare_features
+
+    model = CompiledModel(params)
+    features = model.features
+    output_column = f"predicted_{model.target}"
+    n_rows = 0
+    n_invalid_km = 0
+    n_negative = 0
+    start = time.perf_counter()
+    try:
+        for i, chunk in enumerate(pd.read_csv(input_file, chunksize=chunksize)):
+            X = prepare_features(chunk, features, params['categorical'])
+            inputs = {f: pd.to_numeric(X[f], errors='coerce').to_numpy(dtype=dtype)
+                      for f in features}
+            prices = model.predict(inputs)
+            invalid_km = np.isnan(inputs['km']) | (inputs['km'] < 0) if 'km' in inputs \
+                else np.zeros(len(chunk), dtype=bool)
+            negative = ~invalid_km & (prices < 0)
+            prices[invalid_km | negative] = np.nan
+            chunk[output_column] = np.round(prices, 2)
+            chunk.to_csv(output_file, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            n_rows += len(chunk)
+            n_invalid_km += int(np.count_nonzero(invalid_km))
+            n_negative += int(np.count_nonzero(negative))
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found.")
+        return 1
+    except (KeyError, pd.errors.ParserError) as e:
+        print(f"✗ Error reading '{input_file}': {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"✓ {n_rows} rows scored in {elapsed:.3f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    if n_invalid_km:
+        print(f"  - {n_invalid_km} rows with a missing or negative mileage were not scored")
+    if n_negative:
+        print(f"  - {n_negative} rows with a negative predicted price were discarded")
+    print(f"✓ Predictions saved: {output_file}")
+    return 0
+
 
 def main(args):
     """Main function to load the model and make predictions."""
     
     # Load the model parameters
     print("\nLoading model parameters...")
-    if args.model_file:
+    if args.model:
+        params = ModelRegistry(args.registry).load(args.model)
+    elif args.model_file:
         params = load_model(args.model_file)
     else:
         params = load_model('./models/model_params.json')
@@ -32,26 +102,40 @@ def main(args):
         print("✗ Failed to load model parameters. Exiting.")
         return 1
     print("\n✓ Model parameters loaded successfully.")
-    print(f"  - θ₀: {params['theta0']:.6f}")
-    print(f"  - θ₁: {params['theta1']:.6f}")
+    for i, theta in enumerate(get_theta(params)):
+        print(f"  - θ{str(i).translate(SUBSCRIPT_DIGITS)}: {theta:.6f}")
+    if args.input:
+        output_file = args.output if args.output else 'predictions.csv'
+        print(f"\nScoring '{args.input}' in chunks of {args.chunksize} rows...")
+        return predict_batch(params, args.input, output_file, chunksize=args.chunksize,
+                             dtype=np.dtype(args.dtype))
+    model = CompiledModel(params)
+    features = model.features
+    single_feature = len(features) == 1
 
     # Interactive prediction loop
     print("\n" + "-"*60)
-    print("Enter mileage (km) to predict price (or 'exit' to quit):")
+    if single_feature:
+        print("Enter mileage (km) to predict price (or 'exit' to quit):")
+    else:
+        print(f"Enter {', '.join(features)} (comma separated) to predict price (or 'exit' to quit):")
     print("-"*60)
     while True:
         try:
-            user_input = input("Mileage (km): ")
+            user_input = input("Mileage (km): " if single_feature else f"{','.join(features)}: ")
             if user_input.lower() in ['q', 'quit', 'exit']:
                 print("Exiting prediction mode. Goodbye!")
                 break
 
-            km = float(user_input)
+            values = [float(v) for v in user_input.split(',')]
+            if len(values) != len(features):
+                raise ValueError
+            inputs = dict(zip(features, values))
             
-            if km < 0:
+            if inputs.get('km', 0) < 0:
                 print("Mileage cannot be negative. Please enter a valid value.")
                 continue
-            predicted_price = predict_price(km, params)
+            predicted_price = model.predict(inputs)
             if predicted_price < 0:
                 print("Predicted price is negative, which is not realistic. " \
                 "Please check the model parameters or input value.")
@@ -60,7 +144,7 @@ def main(args):
             print(f"Predicted price: {predicted_price:.2f} €")
             print("="*60)
         except ValueError:
-            print("Invalid input. Please enter a numeric value for mileage or 'exit' to quit.")
+            print("Invalid input. Please enter a numeric value for each feature or 'exit' to quit.")
         except KeyboardInterrupt:
             print("\nExiting prediction mode. Goodbye!")
             break
@@ -70,9 +154,17 @@ def main(args):
         
 if __name__ == "__main__":
     import argparse
+    import sys
     
     parser = argparse.ArgumentParser(description="Predict car prices using a saved linear regression model.")
     parser.add_argument('--model_file', type=str, help='Path to the JSON file containing the model parameters and normalization statistics.')
+    parser.add_argument('--model', type=str, help='Registered model name@ref (latest, best, vN or a hash prefix) used instead of --model_file.')
+    parser.add_argument('--registry', type=str, default=DEFAULT_REGISTRY, help='Directory of the model registry.')
+    parser.add_argument('--input', type=str, help='CSV file to score in batch mode instead of the interactive prompt.')
+    parser.add_argument('--output', type=str, help='CSV file where the batch predictions are written (default: predictions.csv).')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Number of rows scored per chunk in batch mode.')
+    parser.add_argument('--dtype', type=str, choices=('float64', 'float32'), default='float64',
+                        help='Float dtype of the features and predictions in batch mode.')
     
     args = parser.parse_args()
-    main(args)
\ No newline at end of file
+    sys.exit(main(args))
\ No newline at end of file
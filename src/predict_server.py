@@ -0,0 +1,303 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    predict_server.py                                  :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:15:21 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:02:20 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module serves predictions of a saved linear regression model over HTTP.
+The model is loaded once at startup as a CompiledModel, which picks up a newly
+saved model file without restarting. Requests arriving within a small time
+window are grouped and scored with a single vectorized prediction
+(micro-batching), and the server keeps latency percentiles of the recent requests.
+
+Endpoints:
+    POST /predict        {"km": 100000}                  -> {"price": 6354.6}
+    POST /predict/batch  {"km": [100000, 50000, ...]}    -> {"prices": [...]}
+    GET  /stats          request count and p50/p95/p99 latency (ms)
+    GET  /health         {"status": "ok"}
+Multivariate models expect one key per feature column of the model.
+"""
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from collections import deque
+
+import numpy as np
+from model_saver import load_compiled_model
+from model_registry import ModelRegistry, parse_reference, DEFAULT_REGISTRY
+
+# Reason phrases of the status codes returned by the server
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 413: 'Payload Too Large',
+                500: 'Internal Server Error'}
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Groups the prediction requests received within batch_window seconds
+    and scores them with one vectorized prediction.
+    
+    Arguments:
+    model (CompiledModel): The model used to score the requests.
+    batch_window (float): Time in seconds to wait for other requests after the first one.
+    max_batch_size (int): Maximum number of rows scored in one call.
+    """
+    def __init__(self, model, batch_window=0.002, max_batch_size=65536):
+        self.model = model
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        self.n_batches = 0
+
+    async def predict(self, columns):
+        """
+        Queue feature columns for scoring and wait for their predictions.
+        
+        Arguments:
+        columns (dict): {feature: numpy array} with one entry per feature of the model.
+        
+        Returns:
+        numpy array: The predicted prices.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((columns, future))
+        return await future
+
+    async def run(self):
+        """Batching loop, to be run as a background task."""
+        while True:
+            items = [await self.queue.get()]
+            await asyncio.sleep(self.batch_window)
+            n_rows = len(next(iter(items[0][0].values())))
+            while n_rows < self.max_batch_size and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+                n_rows += len(next(iter(items[-1][0].values())))
+            self.score(items)
+
+    def score(self, items):
+        """
+        Score the queued requests at once and resolve their futures.
+        
+        Arguments:
+        items (list): (columns, future) pairs taken from the queue.
+        """
+        self.n_batches += 1
+        try:
+            columns = {f: np.concatenate([c[f] for c, _ in items]) for f in self.model.features}
+            prices = self.model.predict(columns)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for c, future in items:
+            size = len(next(iter(c.values())))
+            if not future.done():
+                future.set_result(prices[offset:offset + size])
+            offset += size
+
+
+class PredictionServer:
+    """
+    Minimal asyncio HTTP/1.1 server (keep-alive, JSON bodies) exposing the model.
+    
+    Arguments:
+    model (CompiledModel): The model used to score the requests.
+    batch_window (float): Micro-batching window in seconds.
+    latency_window (int): Number of recent requests kept for the latency percentiles.
+    """
+    def __init__(self, model, batch_window=0.002, latency_window=10000):
+        self.model = model
+        self.batcher = MicroBatcher(model, batch_window=batch_window)
+        self.latencies = deque(maxlen=latency_window)
+        self.n_requests = 0
+        self.n_predictions = 0
+        self.started = time.time()
+
+    def parse_columns(self, body, bulk):
+        """
+        Validate a request body and convert it to feature columns.
+        
+        Arguments:
+        body (dict): The decoded JSON body.
+        bulk (bool): True if every feature holds a list of values.
+        
+        Returns:
+        dict: {feature: numpy array}
+        """
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object")
+        columns = {}
+        for feature in self.model.features:
+            if feature not in body:
+                raise ValueError(f"Missing feature '{feature}'")
+            values = np.asarray(body[feature] if bulk else [body[feature]], dtype=np.float64)
+            if values.ndim != 1:
+                raise ValueError(f"Feature '{feature}' must be a list of numbers")
+            columns[feature] = values
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("Every feature must have the same number of values")
+        if 'km' in columns and (np.isnan(columns['km']).any() or (columns['km'] < 0).any()):
+            raise ValueError("Mileage cannot be negative")
+        return columns
+
+    def stats(self):
+        """
+        Return the request counters and latency percentiles in milliseconds.
+        
+        Returns:
+        dict: Server statistics.
+        """
+        stats = {
+            'requests': self.n_requests,
+            'predictions': self.n_predictions,
+            'batches': self.batcher.n_batches,
+            'uptime_s': round(time.time() - self.started, 3)
+        }
+        if self.latencies:
+            p50, p95, p99 = np.percentile(np.fromiter(self.latencies, dtype=np.float64), [50, 95, 99])
+            stats.update({'latency_p50_ms': p50 * 1e3, 'latency_p95_ms': p95 * 1e3,
+                          'latency_p99_ms': p99 * 1e3})
+        return stats
+
+    async def route(self, method, path, body):
+        """
+        Dispatch a request to its endpoint.
+        
+        Returns:
+        Tuple: (status code, JSON-serializable response)
+        """
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, self.stats()
+        if path not in ('/predict', '/predict/batch'):
+            return 404, {'error': f"Unknown endpoint '{path}'"}
+        if method != 'POST':
+            return 405, {'error': 'Use POST'}
+        bulk = path == '/predict/batch'
+        try:
+            columns = self.parse_columns(json.loads(body or b'null'), bulk)
+        except (ValueError, TypeError) as e:
+            return 400, {'error': str(e)}
+        prices = await self.batcher.predict(columns)
+        self.n_predictions += len(prices)
+        # Negative prices are not realistic and are returned as null
+        prices = [round(float(p), 2) if p >= 0 else None for p in prices]
+        if bulk:
+            return 200, {'prices': prices}
+        if prices[0] is None:
+            return 400, {'error': 'Predicted price is negative, which is not realistic'}
+        return 200, {'price': prices[0]}
+
+    async def handle_connection(self, reader, writer):
+        """Serve the requests of one client connection until it is closed."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_SIZE:
+                    status, response = 413, {'error': 'Body too large'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, response = await self.route(method, path, body)
+                    except Exception as e:
+                        status, response = 500, {'error': str(e)}
+                    keep_alive = headers.get('connection', '').lower() != 'close' \
+                        and version == 'HTTP/1.1'
+                payload = json.dumps(response).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                self.n_requests += 1
+                self.latencies.append(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        """Start the batching task and serve until SIGINT or SIGTERM."""
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except NotImplementedError:  # Windows: KeyboardInterrupt is raised instead
+                pass
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"✓ Serving predictions on http://{host}:{port} (batch window {self.batcher.batch_window * 1e3:.1f} ms)")
+        try:
+            async with server:
+                await stop
+        finally:
+            batch_task.cancel()
+
+
+def main(args):
+    """Main function to load the model once and serve predictions."""
+    model_file = args.model_file if args.model_file else './models/model_params.json'
+    if args.model:
+        # name@latest serves the latest.json copy, reloaded on new versions and rollbacks
+        model_file = ModelRegistry(args.registry).resolve(*parse_reference(args.model))
+        if model_file is None:
+            print(f"✗ Unknown model '{args.model}' in registry '{args.registry}'. Exiting.")
+            return 1
+    model = load_compiled_model(model_file)
+    if model is None:
+        print("✗ Failed to load model parameters. Exiting.")
+        return 1
+    server = PredictionServer(model, batch_window=args.batch_window_ms / 1e3)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print("\n✓ Server stopped.")
+    for key, value in server.stats().items():
+        print(f"  - {key}: {value:.3f}" if isinstance(value, float) else f"  - {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve car price predictions over HTTP.")
+    parser.add_argument('--model_file', type=str, help='Path to the JSON file containing the model parameters and normalization statistics.')
+    parser.add_argument('--model', type=str, help='Registered model name@ref (latest, best, vN or a hash prefix) used instead of --model_file.')
+    parser.add_argument('--registry', type=str, default=DEFAULT_REGISTRY, help='Directory of the model registry.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to bind (localhost by default).')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on.')
+    parser.add_argument('--batch_window_ms', type=float, default=2.0,
+                        help='Time to wait for concurrent requests before scoring a batch.')
+    args = parser.parse_args()
+    sys.exit(main(args))
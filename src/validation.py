@@ -0,0 +1,260 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    validation.py                                      :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:22:14 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 14:53:59 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+This module estimates how stable the linear regression model is, with
+k-fold cross-validation and bootstrap confidence intervals of R², RMSE and MAE.
+The folds are fitted in parallel on a thread pool (NumPy releases the GIL).
+A model fitted on a polynomial / spline basis (see basis.py) is cross-validated
+with the same basis, its knots being placed on the training rows of each fold.
+The bootstrap precomputes, in one O(n) pass, sufficient statistics of the
+residuals for a fixed number of random blocks of rows. A replicate then
+resamples the blocks with multinomial weights, so its cost does not depend
+on n, and a whole batch of replicates is a single matrix product.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from linear_regression import LinearRegression
+from basis import make_basis, expand
+
+METRICS = ('r2', 'rmse', 'mae')
+CV_SOLVERS = ('gd', 'normal', 'lstsq')
+
+
+def regression_metrics(y, y_pred):
+    """
+    Compute the R², RMSE and MAE of predictions.
+    
+    Args:
+        y (np.array): true target values
+        y_pred (np.array): predicted target values
+        
+    Returns:
+        dict: r2, rmse and mae
+    """
+    errors = y - y_pred
+    ss_res = np.dot(errors, errors)
+    y_centered = y - np.mean(y)
+    ss_tot = np.dot(y_centered, y_centered)
+    return {
+        'r2': float(1 - ss_res / ss_tot),
+        'rmse': float(np.sqrt(ss_res / len(y))),
+        'mae': float(np.mean(np.abs(errors)))
+    }
+
+
+def fold_basis(spec, x):
+    """
+    Rebuild a basis spec on the normalized feature of a fold's training rows:
+    same type, degree and number of knots, the knots at the fold's quantiles.
+    """
+    return make_basis(spec['type'], x, degree=spec.get('degree', 1),
+                      n_knots=len(spec.get('knots', [])))
+
+
+def evaluate_fold(X, y, test_idx, solver='normal', basis=None):
+    """
+    Fit a model on every row outside test_idx and evaluate it on test_idx.
+    The training rows are normalized with their own statistics and the
+    metrics are computed on the test rows in raw units.
+    
+    Args:
+        X (np.array): Raw features, (m, n_features)
+        y (np.array): Raw target values
+        test_idx (np.array): Indices of the held-out rows
+        solver (str): LinearRegression solver ('gd', 'normal' or 'lstsq')
+        basis (dict): Basis spec of the evaluated model, for a single feature
+        
+    Returns:
+        dict: r2, rmse and mae of the fold
+    """
+    train_mask = np.ones(len(y), dtype=bool)
+    train_mask[test_idx] = False
+    X_train, y_train = X[train_mask], y[train_mask]
+    x_mean, x_std = X_train.mean(axis=0), X_train.std(axis=0, ddof=1)
+    x_std[x_std == 0] = 1.0
+    y_mean, y_std = y_train.mean(), y_train.std(ddof=1)
+    X_norm = (X_train - x_mean) / x_std
+    y_norm = (y_train - y_mean) / y_std
+
+    model = LinearRegression(learning_rate=0.03, tolerance=1e-6, n_iterations=1000, solver=solver)
+    if basis is not None:
+        # predict expands the test rows with the same spec
+        model.basis = fold_basis(basis, X_norm)
+        X_norm = expand(X_norm, model.basis)
+    if solver == 'normal':
+        model.normal_equation(X_norm, y_norm)
+    elif solver == 'lstsq':
+        model.least_squares(X_norm, y_norm)
+    else:
+        # Only the last iteration is logged
+        model.gram_gradient_descent(X_norm, y_norm, log_interval=model.n_iterations)
+    y_pred = model.predict((X[test_idx] - x_mean) / x_std) * y_std + y_mean
+    return regression_metrics(y[test_idx], y_pred)
+
+
+def cross_validate(X, y, k=5, solver='normal', seed=None, workers=None, basis=None):
+    """
+    k-fold cross-validation, the folds being fitted in parallel.
+    
+    Args:
+        X (np.array): Raw features, (m,) or (m, n_features)
+        y (np.array): Raw target values
+        k (int): Number of folds
+        solver (str): LinearRegression solver of each fold
+        seed (int): Seed of the row shuffling
+        workers (int): Number of threads (default: one per fold up to the core count)
+        basis (dict): Basis spec of the evaluated model (single feature), None for a linear model
+        
+    Returns:
+        dict: {metric: np.array of the k fold values}
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X[:, np.newaxis]
+    y = np.asarray(y, dtype=np.float64)
+    folds = np.array_split(np.random.default_rng(seed).permutation(len(y)), k)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda idx: evaluate_fold(X, y, idx, solver, basis), folds))
+    return {m: np.array([r[m] for r in results]) for m in METRICS}
+
+
+def block_statistics(y, y_pred, n_blocks=1000, seed=None):
+    """
+    Assign the rows to random blocks and sum, per block, the statistics the
+    metrics are made of: count, Σy, Σy², Σe² and Σ|e| (y centered on its mean
+    for numerical stability).
+    With n <= n_blocks every row is its own block and the bootstrap is exact.
+    
+    Args:
+        y (np.array): true target values
+        y_pred (np.array): predicted target values
+        n_blocks (int): Number of blocks
+        seed (int): Seed of the block assignment
+        
+    Returns:
+        np.array: (n_blocks, 5) block statistics
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_blocks:
+        codes, n_blocks = np.arange(n), n
+    else:
+        codes = np.random.default_rng(seed).integers(0, n_blocks, n)
+    errors = y - y_pred
+    y_centered = y - np.mean(y)
+    return np.column_stack([
+        np.bincount(codes, minlength=n_blocks),
+        np.bincount(codes, weights=y_centered, minlength=n_blocks),
+        np.bincount(codes, weights=y_centered * y_centered, minlength=n_blocks),
+        np.bincount(codes, weights=errors * errors, minlength=n_blocks),
+        np.bincount(codes, weights=np.abs(errors), minlength=n_blocks)
+    ]).astype(np.float64)
+
+
+def metrics_from_sums(sums):
+    """
+    Compute the metrics of replicates from their summed block statistics.
+    
+    Args:
+        sums (np.array): (n_replicates, 5) sums as built by block_statistics
+        
+    Returns:
+        dict: {metric: np.array of the replicate values}
+    """
+    n, s_y, s_yy, sse, sae = sums.T
+    ss_tot = s_yy - s_y * s_y / n
+    return {'r2': 1 - sse / ss_tot, 'rmse': np.sqrt(sse / n), 'mae': sae / n}
+
+
+def bootstrap(y, y_pred, n_replicates=1000, n_blocks=1000, seed=None, workers=None, batch_size=500):
+    """
+    Bootstrap the metrics of fixed predictions. Each replicate draws the blocks
+    of block_statistics with replacement (multinomial weights), so a batch of
+    replicates is the product of a weight matrix with the block statistics.
+    Batches run on a thread pool with independent seeded generators.
+    
+    Args:
+        y (np.array): true target values
+        y_pred (np.array): predicted target values
+        n_replicates (int): Number of bootstrap replicates
+        n_blocks (int): Number of blocks the rows are grouped in
+        seed (int): Seed of the block assignment and of the resampling
+        workers (int): Number of threads
+        batch_size (int): Replicates per batch
+        
+    Returns:
+        dict: {metric: np.array of the n_replicates values}
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    block_seed, resample_seed = seed_sequence.spawn(2)
+    stats = block_statistics(y, y_pred, n_blocks=n_blocks, seed=block_seed)
+    k = len(stats)
+    sizes = [min(batch_size, n_replicates - s) for s in range(0, n_replicates, batch_size)]
+    seeds = resample_seed.spawn(len(sizes))
+
+    def run_batch(args):
+        batch_seed, size = args
+        weights = np.random.default_rng(batch_seed).multinomial(k, np.full(k, 1 / k), size=size)
+        return weights @ stats
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sums = np.vstack(list(pool.map(run_batch, zip(seeds, sizes))))
+    return metrics_from_sums(sums)
+
+
+def normal_interval(values, confidence=0.95):
+    """
+    Confidence interval of the mean of a few values (e.g. fold scores),
+    using the normal approximation mean ± z * std / sqrt(k).
+    
+    Returns:
+        Tuple: (mean, low, high)
+    """
+    mean = float(np.mean(values))
+    half = NormalDist().inv_cdf(0.5 + confidence / 2) * np.std(values, ddof=1) / np.sqrt(len(values))
+    return mean, mean - half, mean + half
+
+
+def percentile_interval(values, confidence=0.95):
+    """
+    Percentile confidence interval of bootstrap replicates.
+    
+    Returns:
+        Tuple: (mean, low, high)
+    """
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(values, [alpha, 1 - alpha])
+    return float(np.mean(values)), float(low), float(high)
+
+
+def display_intervals(title, metrics, interval, confidence=0.95):
+    """
+    Print the mean and confidence interval of each metric.
+    
+    Args:
+        title (str): Title of the table
+        metrics (dict): {metric: np.array of values}
+        interval (callable): normal_interval or percentile_interval
+        confidence (float): Confidence level
+    """
+    print("\n" + "="*60)
+    print(title.center(60))
+    print("="*60)
+    print(f"  {'metric':<8}{'mean':>14}{f'{confidence:.0%} CI low':>18}{f'{confidence:.0%} CI high':>18}")
+    for metric in METRICS:
+        mean, low, high = interval(metrics[metric], confidence)
+        print(f"  {metric.upper():<8}{mean:>14.6f}{low:>18.6f}{high:>18.6f}")
+    print("="*60)
@@ -6,17 +6,73 @@
 #    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
 #                                                 +#+#+#+#+#+   +#+            #
 #    Created: 2026/02/05 16:24:11 by tissad            #+#    #+#              #
-#    Updated: 2026/02/06 13:30:27 by tissad           ###   ########.fr        #
+#    Updated: 2026/10/18 15:06:43 by tissad           ###   ########.fr        #
 #                                                                              #
 # **************************************************************************** #
 
 """
 This module provides functions for visualizing data and model predictions using
 matplotlib. It includes functions to plot the original data points and the
+regression line of the fitted model, the cost history during training, and to
+display the descriptive statistics of the data.
+Scatters of large datasets are sampled down to MAX_SCATTER_POINTS points.
+pyplot is imported by the plotting functions only, so that importing this
+module (e.g. for display_statistics) does not load matplotlib.
 """
-import matplotlib.pyplot as plt
 import numpy as np
 
+# Largest number of points drawn by the scatters, larger data is sampled
+MAX_SCATTER_POINTS = 50000
+
+
+def sample_points(x, y, max_points=MAX_SCATTER_POINTS):
+    """
+    Return at most max_points (x, y) pairs, drawn uniformly without
+    replacement with a fixed seed so the plots are reproducible.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    idx = np.sort(np.random.default_rng(0).choice(len(x), max_points, replace=False))
+    return x[idx], y[idx]
+
+
+def draw_points(ax, x, y, label=None, density=False):
+    """
+    Draw the km vs price points on a matplotlib Axes: a scatter of at most
+    MAX_SCATTER_POINTS sampled points, or with density a hexbin of every row
+    when there are more.
+    """
+    if density and len(x) > MAX_SCATTER_POINTS:
+        ax.hexbin(x, y, gridsize=120, bins='log', cmap='Blues', mincnt=1)
+        if label is not None:
+            # Legend entry of the density
+            ax.scatter([], [], color='blue', marker='h', label=f'{label} ({len(x):,} rows)')
+        return
+    ax.scatter(*sample_points(x, y), alpha=0.6, color='blue', edgecolors='black', s=50, label=label)
+
+
+def draw_cost_history(ax, cost_history, title="Cost History During Training"):
+    """
+    Draw a list of costs, or a CostHistory with its min/max envelope in
+    'ring' mode, on a matplotlib Axes.
+    """
+    if hasattr(cost_history, 'samples'):
+        envelope = cost_history.envelope()
+        if envelope is not None:
+            starts, low, high = envelope
+            ax.fill_between(starts, low, high, step='post', color='green', alpha=0.2,
+                            label='Min/max envelope')
+        ax.plot(*cost_history.samples(), color='green', linewidth=2, label='Cost')
+        if envelope is not None:
+            ax.legend()
+    else:
+        ax.plot(cost_history, color='green', linewidth=2)
+    ax.set_xlabel('Iteration', fontsize=12)
+    ax.set_ylabel('Cost (MSE)', fontsize=12)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+
 def plot_data(data, title="data visualization (km vs price)"):
     """
     Function to visualize the data using a scatter plot.
@@ -25,8 +81,10 @@ def plot_data(data, title="data visualization (km vs price)"):
         data (pd.DataFrame): The DataFrame containing the data to be visualized.
         title (str): The title of the plot.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
-    plt.scatter(data['km'], data['price'], alpha=0.6, color='blue', edgecolors='black')
+    draw_points(plt.gca(), data['km'], data['price'])
     plt.xlabel('Mileage (km)', fontsize=12)
     plt.ylabel('Price', fontsize=12)
     plt.title(title, fontsize=14, fontweight='bold')
@@ -59,11 +117,12 @@ def plot_regression(data, model, stats, title="Linear Regression Fit (km vs pric
         stats (dict): Normalization statistics
         title (str): Title of the plot
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 7))
     
     #   Scatter plot of the original data points
-    plt.scatter(data['km'], data['price'], alpha=0.6, color='blue', 
-                label='original data', edgecolors='black', s=50)
+    draw_points(plt.gca(), data['km'], data['price'], label='original data')
     
     # Regression line
     km_range = np.linspace(data['km'].min(), data['km'].max(), 100)
@@ -91,43 +150,41 @@ def plot_cost_history(cost_history, title="Cost History During Training"):
     of the gradient descent algorithm.
     
     Args:
-        cost_history (list): A list of cost function values recorded 
-        at each iteration of training.
+        cost_history (list or CostHistory): The cost function values recorded
+        at each iteration of training, or the compact history of the model
+        (its min/max envelope is shaded in 'ring' mode).
         title (str): Title of the plot
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
-    plt.plot(cost_history, color='green', linewidth=2)
-    plt.xlabel('Iteration', fontsize=12)
-    plt.ylabel('Cost (MSE)', fontsize=12)
-    plt.title(title, fontsize=14, fontweight='bold')
-    plt.grid(True, alpha=0.3)
+    draw_cost_history(plt.gca(), cost_history, title)
     plt.tight_layout()
     return plt
 
 
+# Section titles and units of the default columns in display_statistics
+STAT_HEADERS = {'km': ("🚗 MILEAGE (KM):", " km"), 'price': ("💰 PRICE:", "")}
+
+
 def display_statistics(stats):
     """
     Function to display the calculated statistics in a formatted manner.
     
     Args:
         stats (dict): A dictionary containing the calculated statistics 
-        for the 'km' and 'price' columns.
+        for each column (e.g. 'km' and 'price').
     """
     print("\n" + "="*60)
     print("📊 STATISTICAL ANALYSIS".center(60))
     print("="*60)
     
-    print("\n🚗 MILEAGE (KM):")
-    print(f"  - Minimum:  {stats['km']['min']:>10.0f} km")
-    print(f"  - Maximum:  {stats['km']['max']:>10.0f} km")
-    print(f"  - Mean:  {stats['km']['mean']:>10.0f} km")
-    print(f"  - median:  {stats['km']['median']:>10.0f} km")
-    print(f"  - Standard Deviation: {stats['km']['std']:>8.0f} km")
-    
-    print("\n💰 PRICE:")
-    print(f"  - Minimum:  {stats['price']['min']:>10.0f}")
-    print(f"  - Maximum:  {stats['price']['max']:>10.0f}")
-    print(f"  - Mean:  {stats['price']['mean']:>10.0f}")
-    print(f"  - median:  {stats['price']['median']:>10.0f}")
-    print(f"  - Standard Deviation: {stats['price']['std']:>8.0f}")
+    for column, column_stats in stats.items():
+        header, unit = STAT_HEADERS.get(column, (f"{column.upper()}:", ""))
+        print(f"\n{header}")
+        print(f"  - Minimum:  {column_stats['min']:>10.0f}{unit}")
+        print(f"  - Maximum:  {column_stats['max']:>10.0f}{unit}")
+        print(f"  - Mean:  {column_stats['mean']:>10.0f}{unit}")
+        print(f"  - median:  {column_stats['median']:>10.0f}{unit}")
+        print(f"  - Standard Deviation: {column_stats['std']:>8.0f}{unit}")
     print("="*60)
\ No newline at end of file
@@ -0,0 +1,36 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    test_data_loader.py                                :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 15:03:27 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:03:27 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+"""
+Regression tests of the binary column cache (data_loader.write_cache/read_cache).
+"""
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data_loader import load_data
+
+
+def test_cache_keeps_missing_text(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text("km,price,make\n1,2,audi\n3,4,\n5,,nan\n")
+    cache_dir = str(tmp_path / 'cache')
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = load_data(str(source), use_cache=True, cache_dir=cache_dir)
+        cached = load_data(str(source), use_cache=True, cache_dir=cache_dir)
+    assert cached['make'].isna().tolist() == parsed['make'].isna().tolist() == [False, True, True]
+    assert cached['make'][0] == 'audi'
+    np.testing.assert_array_equal(cached['price'], parsed['price'])
@@ -0,0 +1,53 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    test_ingest.py                                     :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 15:01:51 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:01:51 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+Regression tests of the parallel CSV ingestion (ingest.ingest_csv).
+"""
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ingest import ingest_csv
+
+
+def ingest(tmp_path, text, **options):
+    """Ingest a CSV text, returning the valid rows and the quarantined ones."""
+    source = tmp_path / 'data.csv'
+    source.write_text(text)
+    quarantine = tmp_path / 'quarantine.csv'
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = ingest_csv(str(source), quarantine_file=str(quarantine), **options)
+    rejected = pd.read_csv(quarantine) if quarantine.exists() else None
+    return data, rejected
+
+
+def test_malformed_first_line_is_quarantined(tmp_path):
+    data, rejected = ingest(tmp_path, "km,price\n1,2,3,4\n50,60\n70,80\n90,100\n")
+    np.testing.assert_array_equal(data['km'], [50, 70, 90])
+    np.testing.assert_array_equal(data['price'], [60, 80, 100])
+    assert rejected['reason'].tolist() == ['malformed:4_fields']
+
+
+def test_text_column(tmp_path):
+    text = "km,price,make\n" + "".join(f"{i},{i + 1},make{i % 3}\n" for i in range(200))
+    data, rejected = ingest(tmp_path, text, chunk_bytes=512)
+    assert rejected is None
+    assert len(data) == 200
+    assert data['make'].tolist() == [f"make{i % 3}" for i in range(200)]
+    np.testing.assert_array_equal(data['km'], np.arange(200))
@@ -0,0 +1,84 @@
+# **************************************************************************** #
+#                                                                              #
+#                                                         :::      ::::::::    #
+#    test_linear_regression.py                          :+:      :+:    :+:    #
+#                                                     +:+ +:+         +:+      #
+#    By: tissad <tissad@student.42.fr>              +#+  +:+       +#+         #
+#                                                 +#+#+#+#+#+   +#+            #
+#    Created: 2026/10/18 14:52:56 by tissad            #+#    #+#              #
+#    Updated: 2026/10/18 15:05:18 by tissad           ###   ########.fr        #
+#                                                                              #
+# **************************************************************************** #
+
+"""
+Regression tests of the float32 precision check (linear_regression.check_precision)
+and of the gradient descent kernels.
+"""
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from linear_regression import LinearRegression, check_precision, precision_rows
+
+
+@pytest.fixture
+def data():
+    """Normalized km / price data in float64 and its float32 copy."""
+    rng = np.random.default_rng(0)
+    km = rng.uniform(0, 300000, 2000)
+    price = 9000 - 0.025 * km + rng.normal(0, 600, km.size)
+    X = (km - km.mean()) / km.std()
+    y = (price - price.mean()) / price.std()
+    return X, y, X.astype(np.float32), y.astype(np.float32)
+
+
+@pytest.mark.parametrize('options', [{'solver': 'gd'}, {'solver': 'gd', 'gd_kernel': 'reference'},
+                                     {'solver': 'sgd', 'random_state': 0}])
+def test_check_precision_keeps_the_model(data, options):
+    X, y, X32, y32 = data
+    model = LinearRegression(dtype=np.float32, n_iterations=200, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X32, y32)
+        theta = model.theta.copy()
+        result = check_precision(model, X32, y32, X_reference=X, y_reference=y)
+    np.testing.assert_array_equal(model.theta, theta)
+    assert result['theta_drift'] > 0
+
+
+@pytest.mark.parametrize('tolerance, n_iterations', [(0.0, 50), (1e-4, 1000)])
+def test_gram_kernel_matches_reference(data, tolerance, n_iterations):
+    X, y, _, _ = data
+    X = np.column_stack([X, X ** 2 - 1])
+    models = [LinearRegression(tolerance=tolerance, n_iterations=n_iterations, gd_kernel=kernel)
+              for kernel in ('gram', 'reference')]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for model in models:
+            model.fit(X, y)
+    gram, reference = models
+    assert gram.converged_iteration == reference.converged_iteration
+    if tolerance:
+        assert reference.converged_iteration < n_iterations - 1
+    # The intercept of normalized data is ~0, so compare it absolutely
+    np.testing.assert_allclose(gram.theta, reference.theta, atol=1e-12)
+    np.testing.assert_allclose(gram.cost_history.samples()[1], reference.cost_history.samples()[1],
+                               atol=1e-12)
+
+
+def test_check_precision_on_a_sample(data):
+    X, y, X32, y32 = data
+    model = LinearRegression(dtype=np.float32, n_iterations=200)
+    rows = precision_rows(len(y), 500, seed=0)
+    assert len(rows) == 500 and precision_rows(len(y), 0) is None
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X32, y32)
+        theta = model.theta.copy()
+        result = check_precision(model, X32[rows], y32[rows], X_reference=X[rows],
+                                 y_reference=y[rows], refit=True)
+    np.testing.assert_array_equal(model.theta, theta)
+    assert result['within_tolerance']